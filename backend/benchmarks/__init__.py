@@ -0,0 +1,4 @@
+"""Offline benchmarks: an in-memory Supabase stand-in, seeded datasets and a load runner.
+
+Run with ``python -m backend.benchmarks --help``.
+"""
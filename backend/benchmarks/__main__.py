@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import os
+
+OFFLINE_ENV = {
+    "SUPABASE_URL": "https://offline.invalid",
+    "SUPABASE_SERVICE_ROLE_KEY": "offline",
+    "DATABASE_URL": "postgresql://offline.invalid/postgres",
+}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.benchmarks",
+        description="Drive the FastAPI app against seeded in-memory data and report latency percentiles.",
+    )
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all); 'wkb' runs the decoder micro-benchmark")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="requests per endpoint and concurrency level")
+    parser.add_argument("-c", "--concurrency", default="1,16", help="comma-separated concurrency levels")
+    parser.add_argument("--cold", action="store_true", help="clear the service caches before every request")
+    parser.add_argument("--allocations", action="store_true", help="record peak traced allocations (slower)")
+    parser.add_argument(
+        "--live", metavar="USER_ID",
+        help="skip seeding and use get_db as configured (DB_BACKEND), reading the data of USER_ID",
+    )
+    args = parser.parse_args()
+
+    if not args.live:
+        for key, value in OFFLINE_ENV.items():
+            os.environ.setdefault(key, value)
+
+    from backend.benchmarks.runner import SCENARIOS, format_table, run_scenario, wkb_decoding
+
+    names = args.scenarios or [*SCENARIOS, "wkb"]
+    unknown = set(names) - {*SCENARIOS, "wkb"}
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    concurrencies = [int(c) for c in args.concurrency.split(",")]
+
+    stats = []
+    for name in names:
+        if name == "wkb":
+            stats += wkb_decoding()
+            continue
+        scenario = SCENARIOS[name]()
+        print(f"# {scenario.name}: {scenario.description}", flush=True)
+        stats += asyncio.run(run_scenario(
+            scenario, args.requests, concurrencies, args.cold, args.allocations, args.live,
+        ))
+    print(format_table(stats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""In-memory stand-in for the Supabase client.
+
+``FakeClient`` implements the table, rpc and storage calls the services make, evaluating
+the PostgREST syntax against Python rows, so the app can run offline through a
+``get_db`` dependency override. An optional per-call latency models the PostgREST round trip.
+"""
+
+import struct
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from postgrest.exceptions import APIError
+
+from backend.db.postgrest_syntax import RELATIONS, Condition, Embed, Logic, parse_logic, parse_order, parse_select
+
+EWKB_POINT_PREFIX = "0101000020E6100000"
+PUBLIC_URL = "https://storage.invalid/storage/v1/object/public"
+
+PROFILE_GRAPH_COLUMNS = (
+    "username", "full_name", "avatar_url", "avatar_thumbnail_url", "avatar_medium_url", "avatar_webp_url",
+)
+
+TIMESTAMP_DEFAULTS = {
+    "memories": "created_at",
+    "photos": "uploaded_at",
+    "memory_shares": "shared_at",
+}
+
+class Result(NamedTuple):
+    data: Any
+    count: Optional[int] = None
+
+def point_ewkb(lat: float, lng: float) -> str:
+    """Hex EWKB of a SRID 4326 point, as PostgREST returns geography columns."""
+    return EWKB_POINT_PREFIX + struct.pack("<dd", lng, lat).hex().upper()
+
+def ewkb_lat_lng(value: str) -> Optional[Tuple[float, float]]:
+    if not isinstance(value, str) or not value.upper().startswith(EWKB_POINT_PREFIX):
+        return None
+    lng, lat = struct.unpack("<dd", bytes.fromhex(value[len(EWKB_POINT_PREFIX):]))
+    return lat, lng
+
+def _wkt_to_ewkb(value: Any) -> Any:
+    if isinstance(value, str) and value.upper().startswith("POINT("):
+        lng, lat = map(float, value[6:-1].split())
+        return point_ewkb(lat, lng)
+    return value
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _coerce(row_value: Any, value: Any) -> Tuple[Any, Any]:
+    """Compare numbers numerically and everything else as PostgREST text values."""
+    if isinstance(row_value, (int, float)) and not isinstance(row_value, bool):
+        return row_value, float(value)
+    return str(row_value), str(value)
+
+def _match(row: Dict[str, Any], cond: Condition) -> bool:
+    value = row.get(cond.column)
+    if cond.op == "is":
+        return value is {"null": None, "true": True, "false": False}[str(cond.value).lower()]
+    if value is None:
+        return False
+    if cond.op == "in":
+        return str(value) in cond.value
+    if cond.op in ("like", "ilike"):
+        pattern, text = str(cond.value).replace("*", "%"), str(value)
+        if cond.op == "ilike":
+            pattern, text = pattern.lower(), text.lower()
+        parts = pattern.split("%")
+        return text.startswith(parts[0]) and text.endswith(parts[-1]) and all(p in text for p in parts)
+    left, right = _coerce(value, cond.value)
+    return {
+        "eq": left == right,
+        "neq": left != right,
+        "gt": left > right,
+        "gte": left >= right,
+        "lt": left < right,
+        "lte": left <= right,
+    }[cond.op]
+
+def _prepare(cond: Any) -> Any:
+    """Turn ``in`` value lists into sets of their text forms once, when the filter is added."""
+    if isinstance(cond, Logic):
+        return Logic(cond.joiner, [_prepare(term) for term in cond.terms])
+    if cond.op == "in":
+        return cond._replace(value=frozenset(str(v) for v in cond.value))
+    return cond
+
+def _match_logic(row: Dict[str, Any], logic: Logic) -> bool:
+    results = (
+        _match_logic(row, term) if isinstance(term, Logic) else _match(row, term)
+        for term in logic.terms
+    )
+    return all(results) if logic.joiner == "and" else any(results)
+
+class FakeDatabase:
+    """Tables of dict rows with lazily built equality indexes."""
+
+    def __init__(self) -> None:
+        self.tables: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.lock = threading.RLock()
+        self._indexes: Dict[Tuple[str, str], Dict[Any, List[Dict[str, Any]]]] = {}
+        self.calls: Dict[str, int] = defaultdict(int)
+
+    def insert_rows(self, table: str, rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        out = []
+        for row in rows:
+            row = {k: _wkt_to_ewkb(v) if k == "location" else v for k, v in row.items()}
+            row.setdefault("id", str(uuid4()))
+            if table in TIMESTAMP_DEFAULTS:
+                row.setdefault(TIMESTAMP_DEFAULTS[table], _now())
+            self.tables[table].append(row)
+            out.append(row)
+        self.touch(table)
+        return out
+
+    def touch(self, table: str) -> None:
+        for key in [k for k in self._indexes if k[0] == table]:
+            del self._indexes[key]
+
+    def lookup(self, table: str, column: str, value: Any) -> List[Dict[str, Any]]:
+        index = self._indexes.get((table, column))
+        if index is None:
+            index = defaultdict(list)
+            for row in self.tables[table]:
+                index[str(row.get(column))].append(row)
+            self._indexes[(table, column)] = index
+        return index.get(str(value), [])
+
+class FakeQuery:
+    """Chainable query mirroring the supabase-py request builders."""
+
+    def __init__(self, client: "FakeClient", table: str, source: Optional[Callable[[], List[Dict[str, Any]]]] = None) -> None:
+        self._client = client
+        self._table = table
+        self._source = source
+        self._method = "select"
+        self._columns = "*"
+        self._payload: Any = None
+        self._returning = True
+        self._conditions: List[Any] = []
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._single = False
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "FakeQuery":
+        self._columns = ",".join(columns) or "*"
+        return self
+
+    def insert(self, json: Any, *, returning: Any = "representation", **_: Any) -> "FakeQuery":
+        self._method, self._payload = "insert", json
+        self._returning = str(getattr(returning, "value", returning)) != "minimal"
+        return self
+
+    def update(self, json: Dict[str, Any], **_: Any) -> "FakeQuery":
+        self._method, self._payload = "update", json
+        return self
+
+    def delete(self, **_: Any) -> "FakeQuery":
+        self._method = "delete"
+        return self
+
+    def filter(self, column: str, operator: str, criteria: Any) -> "FakeQuery":
+        self._conditions.append(_prepare(Condition(column, operator, criteria)))
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self.filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self.filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self.filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self.filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self.filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self.filter(column, "lte", value)
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        return self.filter(column, "is", value)
+
+    def in_(self, column: str, values: Sequence[Any]) -> "FakeQuery":
+        return self.filter(column, "in", list(values))
+
+    def match(self, query: Dict[str, Any]) -> "FakeQuery":
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    def or_(self, filters: str) -> "FakeQuery":
+        self._conditions.append(_prepare(parse_logic(filters)))
+        return self
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None) -> "FakeQuery":
+        self._order.append(column + (".desc" if desc else ""))
+        return self
+
+    def limit(self, size: int) -> "FakeQuery":
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self) -> "FakeQuery":
+        self._single = True
+        return self
+
+    def _candidates(self, db: FakeDatabase) -> List[Dict[str, Any]]:
+        if self._source is not None:
+            rows = self._source()
+        else:
+            indexed = next((c for c in self._conditions if isinstance(c, Condition) and c.op in ("eq", "in")), None)
+            if indexed is None:
+                rows = db.tables[self._table]
+            elif indexed.op == "eq":
+                rows = db.lookup(self._table, indexed.column, indexed.value)
+            else:
+                rows = [row for value in indexed.value for row in db.lookup(self._table, indexed.column, value)]
+        return [
+            row for row in rows
+            if all(_match_logic(row, c) if isinstance(c, Logic) else _match(row, c) for c in self._conditions)
+        ]
+
+    def _project(self, db: FakeDatabase, items: List[Any], row: Dict[str, Any]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for item in items:
+            if not isinstance(item, Embed):
+                out.update(row if item == "*" else {item: row.get(item)})
+                continue
+            local, remote, many = RELATIONS[(self._table, item.resource)]
+            related = [
+                dict(r) if item.columns == ["*"] else {c: r.get(c) for c in item.columns}
+                for r in db.lookup(item.resource, remote, row.get(local))
+            ]
+            out[item.resource] = related if many else (related[0] if related else None)
+        return out
+
+    def execute(self) -> Result:
+        self._client.wait()
+        db = self._client.db
+        with db.lock:
+            db.calls[f"{self._method}:{self._table}"] += 1
+            if self._method == "insert":
+                payload = self._payload if isinstance(self._payload, list) else [self._payload]
+                rows = db.insert_rows(self._table, [dict(r) for r in payload])
+                return Result([dict(r) for r in rows] if self._returning else [])
+            rows = self._candidates(db)
+            if self._method == "update":
+                values = {k: _wkt_to_ewkb(v) if k == "location" else v for k, v in self._payload.items()}
+                for row in rows:
+                    row.update(values)
+                db.touch(self._table)
+            elif self._method == "delete":
+                ids = {id(row) for row in rows}
+                db.tables[self._table] = [r for r in db.tables[self._table] if id(r) not in ids]
+                db.touch(self._table)
+            else:
+                for spec in reversed(self._order):
+                    for term in reversed(parse_order(spec)):
+                        rows = sorted(rows, key=lambda r: (r.get(term.column) is None, r.get(term.column)), reverse=term.descending)
+                if self._limit is not None:
+                    rows = rows[self._offset:self._offset + self._limit]
+                items = parse_select(self._columns)
+                rows = [self._project(db, items, row) for row in rows]
+            if self._method != "select":
+                rows = [dict(row) for row in rows]
+        if self._single:
+            if len(rows) != 1:
+                raise APIError({
+                    "code": "PGRST116",
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "details": f"The result contains {len(rows)} rows",
+                    "hint": None,
+                })
+            return Result(rows[0])
+        return Result(rows)
+
+class FakeBucket:
+    def __init__(self, client: "FakeClient", bucket: str) -> None:
+        self._client = client
+        self._bucket = bucket
+
+    def upload(self, path: str, file: Any, file_options: Optional[Dict[str, str]] = None) -> None:
+        self._client.wait()
+        content = file if isinstance(file, bytes) else file.read()
+        self._client.objects[(self._bucket, path)] = content
+
+    def get_public_url(self, path: str) -> str:
+        return f"{PUBLIC_URL}/{self._bucket}/{path}"
+
+    def remove(self, paths: List[str]) -> List[Dict[str, str]]:
+        self._client.wait()
+        for path in paths:
+            self._client.objects.pop((self._bucket, path), None)
+        return [{"name": p} for p in paths]
+
+    def download(self, path: str) -> bytes:
+        self._client.wait()
+        return self._client.objects[(self._bucket, path)]
+
+class FakeStorage:
+    def __init__(self, client: "FakeClient") -> None:
+        self._client = client
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self._client, bucket)
+
+class FakeClient:
+    """Drop-in replacement for ``supabase.Client`` backed by ``FakeDatabase``."""
+
+    def __init__(self, db: Optional[FakeDatabase] = None, latency: float = 0.0) -> None:
+        self.db = db or FakeDatabase()
+        self.latency = latency
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.storage = FakeStorage(self)
+
+    def wait(self) -> None:
+        """Block for the simulated round trip; runs in the worker pool like the real client."""
+        if self.latency:
+            time.sleep(self.latency)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> FakeQuery:
+        handler = getattr(self, f"_rpc_{name}")
+        return FakeQuery(self, name, source=lambda: handler(**(params or {})))
+
+    def _rpc_memories_in_bbox(
+        self,
+        p_user_id: str,
+        p_min_lng: float,
+        p_min_lat: float,
+        p_max_lng: float,
+        p_max_lat: float,
+        p_include_shared: bool = True,
+        p_limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        visible = list(self.db.lookup("memories", "created_by", p_user_id))
+        if p_include_shared:
+            shared = {s["memory_id"] for s in self.db.lookup("memory_shares", "shared_with", p_user_id)}
+            visible += [m for memory_id in shared for m in self.db.lookup("memories", "id", memory_id)]
+        rows = []
+        for row in visible:
+            coords = ewkb_lat_lng(row.get("location"))
+            if coords and p_min_lat <= coords[0] <= p_max_lat and p_min_lng <= coords[1] <= p_max_lng:
+                rows.append(row)
+        rows.sort(key=lambda r: r["created_at"], reverse=True)
+        return rows[:p_limit] if p_limit is not None else rows
+
+    def _rpc_friend_graph(self, p_user_id: str) -> List[Dict[str, Any]]:
+        edges = self.db.lookup("friendships", "user_id", p_user_id) + self.db.lookup("friendships", "friend_id", p_user_id)
+        rows = []
+        for edge in edges:
+            other = edge["friend_id"] if edge["user_id"] == p_user_id else edge["user_id"]
+            profile = next(iter(self.db.lookup("profiles", "id", other)), {})
+            rows.append({
+                "user_id": edge["user_id"],
+                "friend_id": edge["friend_id"],
+                "status": edge["status"],
+                "id": other,
+                **{k: profile.get(k) for k in PROFILE_GRAPH_COLUMNS},
+            })
+        return rows
+
+    def _rpc_search_users(
+        self,
+        p_query: Optional[str] = None,
+        p_exclude: Optional[str] = None,
+        p_limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        term = (p_query or "").strip().lower()
+        rows = []
+        for profile in self.db.tables["profiles"]:
+            username = (profile.get("username") or "").lower()
+            if profile["id"] == p_exclude or (term and term not in username):
+                continue
+            rank = 0 if not term or username.startswith(term) else 1
+            rows.append((rank, username, {
+                k: profile.get(k) for k in ("id", "email", "username", "full_name", "avatar_url")
+            }))
+        rows.sort(key=lambda r: r[:2])
+        rows = [r[2] for r in rows]
+        return rows[:p_limit] if p_limit is not None else rows
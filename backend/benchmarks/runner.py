@@ -0,0 +1,350 @@
+import asyncio
+import io
+import itertools
+import math
+import os
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+from PIL import Image
+
+from backend.benchmarks.fake_supabase import FakeClient, point_ewkb
+from backend.benchmarks.seed import LAT_RANGE, LNG_RANGE, Dataset, seed
+from backend.core.cache import cache
+from backend.core.config import settings
+from backend.db.instrumented import InstrumentedClient
+from backend.db.supabase import get_db
+from backend.main import create_app
+from backend.services.friend_service import adjacency
+from backend.utils.geo import wkb_point_to_lat_lng, wkb_points_to_lat_lng
+
+Request = Tuple[str, str, Dict[str, Any]]
+
+class Endpoint(NamedTuple):
+    name: str
+    build: Callable[[Dataset, int], Request]
+    requests: Optional[int] = None
+    needs_seed: bool = False
+
+class Scenario(NamedTuple):
+    name: str
+    description: str
+    dataset: Dict[str, int]
+    endpoints: List[Endpoint]
+    latency: float = 0.0
+    cold: bool = False
+    background: List[Endpoint] = []
+
+class Stats(NamedTuple):
+    scenario: str
+    endpoint: str
+    concurrency: int
+    requests: int
+    errors: int
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_bytes: float
+    calls_per_request: Optional[float]
+    peak_alloc_kb: Optional[float]
+
+def _get(path: str, **params: Any) -> Request:
+    return "GET", path, {"params": params}
+
+def _tile(lat: float, lng: float, z: int) -> Tuple[int, int, int]:
+    n = 1 << z
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return z, x, y
+
+def _random_point(i: int) -> Tuple[float, float]:
+    rng = random.Random(i)
+    return rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)
+
+def _jpeg(width: int = 2400, height: int = 1600) -> bytes:
+    noise = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    out = io.BytesIO()
+    Image.fromarray(noise).save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+def _gpx(points: int) -> bytes:
+    waypoints = "".join(
+        f'<wpt lat="{lat:.6f}" lon="{lng:.6f}"><name>Point {i}</name></wpt>'
+        for i, (lat, lng) in enumerate(map(_random_point, range(points)))
+    )
+    return f'<?xml version="1.0"?><gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">{waypoints}</gpx>'.encode()
+
+WKB_EDGE_CASES = [
+    None,
+    "0101000020E6100000000000000000F87F000000000000F87F",  # POINT EMPTY
+    "not-hex",
+    "0101000020E61000",  # truncated
+    "0102000020E61000000200000000000000000000000000000000000000000000000000F03F000000000000F03F",  # LINESTRING
+]
+POLAND = {"min_lat": LAT_RANGE[0], "min_lng": LNG_RANGE[0], "max_lat": LAT_RANGE[1], "max_lng": LNG_RANGE[1]}
+
+def _read_endpoints() -> List[Endpoint]:
+    return [
+        Endpoint("memories (full list)", lambda ds, i: _get("/memories/", user_id=ds.hot_user)),
+        Endpoint("memories (page of 50)", lambda ds, i: _get("/memories/", user_id=ds.hot_user, limit=50)),
+        Endpoint("memories shared", lambda ds, i: _get("/memories/shared", user_id=ds.hot_user)),
+        Endpoint("memories in-bbox", lambda ds, i: _get("/memories/in-bbox", user_id=ds.hot_user, **POLAND)),
+        Endpoint("memories clusters z6", lambda ds, i: _get("/memories/clusters", user_id=ds.hot_user, zoom=6, **POLAND)),
+        Endpoint("memories points columnar", lambda ds, i: _get("/memories/points", user_id=ds.hot_user)),
+        Endpoint("memories points binary", lambda ds, i: _get("/memories/points", user_id=ds.hot_user, format="binary")),
+        Endpoint("memories nearby 5 km", lambda ds, i: _get(
+            "/memories/nearby", user_id=ds.hot_user, lat=_random_point(i)[0], lng=_random_point(i)[1],
+        )),
+        Endpoint("tiles z10", lambda ds, i: _get(
+            "/tiles/{}/{}/{}.mvt".format(*_tile(*_random_point(i), 10)), user_id=ds.hot_user,
+        )),
+        Endpoint("photos of a memory", lambda ds, i: _get(
+            "/photos/", memory_id=ds.memory_ids[i % len(ds.memory_ids)],
+        ), needs_seed=True),
+        Endpoint("friends", lambda ds, i: _get("/friends/", user_id=ds.hot_user)),
+        Endpoint("friend graph", lambda ds, i: _get("/friends/graph", user_id=ds.hot_user)),
+        Endpoint("users search", lambda ds, i: _get("/users", search=f"user{i % 100}", current_user=ds.hot_user)),
+        Endpoint("users page of 50", lambda ds, i: _get("/users", current_user=ds.hot_user, limit=50)),
+        Endpoint("profile", lambda ds, i: _get("/profile", user_id=ds.user_ids[i % len(ds.user_ids)])),
+        Endpoint("export ndjson", lambda ds, i: _get("/memories/export", user_id=ds.hot_user, format="ndjson"), requests=5),
+    ]
+
+def _upload_endpoint(files: int) -> Endpoint:
+    content = _jpeg()
+
+    def build(ds: Dataset, i: int) -> Request:
+        return "POST", f"/memories/{ds.memory_ids[i % len(ds.memory_ids)]}/upload-photos", {
+            "params": {"user_id": ds.hot_user},
+            "files": [("files", (f"{i}-{n}.jpg", content, "image/jpeg")) for n in range(files)],
+        }
+
+    return Endpoint(f"upload {files} x {len(content) // 1024} KiB", build, requests=20, needs_seed=True)
+
+def _import_endpoint(points: int) -> Endpoint:
+    content = _gpx(points)
+    return Endpoint(f"import GPX {points} waypoints", lambda ds, i: ("POST", "/memories/import", {
+        "params": {"user_id": ds.hot_user},
+        "files": {"file": ("import.gpx", content, "application/gpx+xml")},
+    }), requests=3, needs_seed=True)
+
+SCENARIOS: Dict[str, Callable[[], Scenario]] = {
+    "reads": lambda: Scenario(
+        "reads", "Read endpoints on 10k memories, 100k photos and a dense friend graph",
+        {"memories": 10_000, "photos": 100_000, "shares": 1_000, "friend_degree": 100},
+        _read_endpoints(),
+    ),
+    "concurrency": lambda: Scenario(
+        "concurrency", "Cold small reads with a 20 ms round trip while exports and uploads run alongside",
+        {"users": 200, "memories": 500, "photos": 5_000, "shares": 100},
+        [e for e in _read_endpoints() if e.name in ("profile", "photos of a memory", "memories (page of 50)")],
+        latency=0.02,
+        cold=True,
+        background=[e for e in _read_endpoints() if e.name == "export ndjson"] + [_upload_endpoint(4)],
+    ),
+    "coalescing": lambda: Scenario(
+        "coalescing", "Identical concurrent reads on a cold cache with a 50 ms round trip",
+        {"users": 200, "memories": 100, "photos": 1_000, "shares": 0, "share_fanout": 100},
+        [
+            Endpoint("same photo list", lambda ds, i: _get("/photos/", memory_id=ds.memory_ids[0]), needs_seed=True),
+            Endpoint("same share list", lambda ds, i: _get(f"/memories/{ds.memory_ids[0]}/shares"), needs_seed=True),
+            Endpoint("same profile", lambda ds, i: _get("/profile", user_id=ds.hot_user)),
+        ],
+        latency=0.05,
+        cold=True,
+    ),
+    "shares-1k": lambda: Scenario(
+        "shares-1k", "Shared memories and share lists with 1k shares",
+        {"users": 1_001, "memories": 100, "photos": 0, "shares": 1_000, "share_fanout": 1_000, "friend_degree": 20},
+        [
+            Endpoint("memories shared", lambda ds, i: _get("/memories/shared", user_id=ds.hot_user)),
+            Endpoint("shares of one memory", lambda ds, i: _get(f"/memories/{ds.memory_ids[0]}/shares"), needs_seed=True),
+        ],
+    ),
+    "shares-10k": lambda: Scenario(
+        "shares-10k", "Shared memories and share lists with 10k shares",
+        {"users": 10_001, "memories": 100, "photos": 0, "shares": 10_000, "share_fanout": 10_000, "friend_degree": 20},
+        [
+            Endpoint("memories shared", lambda ds, i: _get("/memories/shared", user_id=ds.hot_user)),
+            Endpoint("shares of one memory", lambda ds, i: _get(f"/memories/{ds.memory_ids[0]}/shares"), needs_seed=True),
+        ],
+    ),
+    "nearby-100k": lambda: Scenario(
+        "nearby-100k", "Radius search over 100k memories",
+        {"users": 50, "memories": 100_000, "photos": 0, "shares": 0, "friend_degree": 10},
+        [e for e in _read_endpoints() if e.name == "memories nearby 5 km"],
+    ),
+    "uploads": lambda: Scenario(
+        "uploads", "Batch photo uploads streamed through spooled temporary files",
+        {"users": 10, "memories": 10, "photos": 0, "shares": 0, "friend_degree": 5},
+        [_upload_endpoint(4)],
+    ),
+    "import": lambda: Scenario(
+        "import", "Bulk GPX import",
+        {"users": 10, "memories": 0, "photos": 0, "shares": 0, "friend_degree": 5},
+        [_import_endpoint(10_000)],
+    ),
+}
+
+def _reset_caches() -> None:
+    # Drop stored entries only, so loads already in flight can still be shared.
+    cache.backend.clear()
+    adjacency.clear()
+
+async def _drive(client: httpx.AsyncClient, ds: Dataset, endpoint: Endpoint) -> None:
+    """Issue requests to ``endpoint`` back to back until cancelled, as background load."""
+    for i in itertools.count():
+        method, url, kwargs = endpoint.build(ds, i)
+        await client.request(method, url, **kwargs)
+
+async def _measure(
+    client: httpx.AsyncClient,
+    ds: Dataset,
+    endpoint: Endpoint,
+    requests: int,
+    concurrency: int,
+    cold: bool,
+) -> Tuple[List[float], int, int]:
+    latencies: List[float] = []
+    errors = size = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors, size
+        for i in counter:
+            if cold:
+                _reset_caches()
+            method, url, kwargs = endpoint.build(ds, i)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            size += len(response.content)
+            if response.status_code >= 400:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, size
+
+async def run_scenario(
+    scenario: Scenario,
+    requests: int,
+    concurrencies: Sequence[int],
+    cold: bool,
+    allocations: bool,
+    live_user: Optional[str] = None,
+) -> List[Stats]:
+    """Drive every endpoint of a scenario through the ASGI app and collect latency statistics."""
+    app = create_app()
+    cold = cold or scenario.cold
+    fake: Optional[FakeClient] = None
+    if live_user:
+        ds = Dataset(None, [live_user], live_user, [], [])
+        endpoints = [e for e in scenario.endpoints if not e.needs_seed]
+        background = [e for e in scenario.background if not e.needs_seed]
+    else:
+        ds = seed(**scenario.dataset)
+        fake = FakeClient(ds.db, latency=scenario.latency)
+        db = InstrumentedClient(fake) if settings.metrics_enabled else fake
+        app.dependency_overrides[get_db] = lambda: db
+        endpoints = scenario.endpoints
+        background = scenario.background
+    _reset_caches()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        load = [asyncio.create_task(_drive(client, ds, e)) for e in background]
+        try:
+            # Background requests make backend calls too, so calls per request is only counted without them.
+            counted = fake if not load else None
+            return await _measure_endpoints(
+                client, ds, scenario.name, endpoints, requests, concurrencies, cold, allocations, counted,
+            )
+        finally:
+            for task in load:
+                task.cancel()
+            await asyncio.gather(*load, return_exceptions=True)
+
+async def _measure_endpoints(
+    client: httpx.AsyncClient,
+    ds: Dataset,
+    scenario: str,
+    endpoints: Sequence[Endpoint],
+    requests: int,
+    concurrencies: Sequence[int],
+    cold: bool,
+    allocations: bool,
+    fake: Optional[FakeClient],
+) -> List[Stats]:
+    results = []
+    for endpoint in endpoints:
+        count = endpoint.requests or requests
+        await _measure(client, ds, endpoint, 1, 1, cold)
+        for concurrency in concurrencies:
+            if allocations:
+                tracemalloc.start()
+            calls = sum(fake.db.calls.values()) if fake else 0
+            wall = time.perf_counter()
+            latencies, errors, size = await _measure(client, ds, endpoint, count, concurrency, cold)
+            wall = time.perf_counter() - wall
+            calls = (sum(fake.db.calls.values()) - calls) / count if fake else None
+            peak = None
+            if allocations:
+                peak = tracemalloc.get_traced_memory()[1] / 1024
+                tracemalloc.stop()
+            ms = np.array(latencies) * 1000
+            results.append(Stats(
+                scenario, endpoint.name, concurrency, count, errors, count / wall,
+                float(np.percentile(ms, 50)), float(np.percentile(ms, 95)), float(np.percentile(ms, 99)),
+                size / count, calls, peak,
+            ))
+    return results
+
+def wkb_decoding(rows: int = 100_000, repeat: int = 3) -> List[Stats]:
+    """Compare the per-row Shapely decoder with the vectorized one on ``rows`` locations.
+
+    Every hundredth location is an edge case (NULL, POINT EMPTY, malformed or non-point WKB)
+    and both decoders must agree on which rows they drop.
+    """
+    locations = [
+        WKB_EDGE_CASES[i // 100 % len(WKB_EDGE_CASES)] if i % 100 == 99 else point_ewkb(*_random_point(i))
+        for i in range(rows)
+    ]
+    scalar = [wkb_point_to_lat_lng(loc) if loc else None for loc in locations]
+    lat, lng, valid = wkb_points_to_lat_lng(locations)
+    vectorized = [(lat[i], lng[i]) if valid[i] else None for i in range(rows)]
+    if scalar != vectorized:
+        raise AssertionError("scalar and vectorized WKB decoders disagree")
+    results = []
+    for name, decode in (
+        ("scalar wkb_point_to_lat_lng", lambda: [wkb_point_to_lat_lng(loc) for loc in locations]),
+        ("vectorized wkb_points_to_lat_lng", lambda: wkb_points_to_lat_lng(locations)),
+    ):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            decode()
+            timings.append((time.perf_counter() - start) * 1000)
+        ms = np.array(timings)
+        results.append(Stats(
+            "wkb", f"{name} ({rows} rows)", 1, repeat, 0, repeat / (ms.sum() / 1000),
+            float(np.percentile(ms, 50)), float(np.percentile(ms, 95)), float(np.percentile(ms, 99)), 0, None, None,
+        ))
+    return results
+
+def format_table(stats: Sequence[Stats]) -> str:
+    header = f"{'scenario':<12} {'endpoint':<36} {'conc':>4} {'reqs':>5} {'err':>4} {'req/s':>9} " \
+             f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'KiB/resp':>9} {'calls/req':>9} {'peak KiB':>9}"
+    lines = [header, "-" * len(header)]
+    for s in stats:
+        peak = f"{s.peak_alloc_kb:9.0f}" if s.peak_alloc_kb is not None else f"{'-':>9}"
+        calls = f"{s.calls_per_request:9.2f}" if s.calls_per_request is not None else f"{'-':>9}"
+        lines.append(
+            f"{s.scenario:<12} {s.endpoint[:36]:<36} {s.concurrency:>4} {s.requests:>5} {s.errors:>4} "
+            f"{s.throughput:>9.1f} {s.p50_ms:>9.2f} {s.p95_ms:>9.2f} {s.p99_ms:>9.2f} "
+            f"{s.mean_bytes / 1024:>9.1f} {calls} {peak}"
+        )
+    return os.linesep.join(lines)
@@ -0,0 +1,118 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple
+
+from backend.benchmarks.fake_supabase import FakeDatabase, point_ewkb
+
+# Roughly the extent of Poland, so clustering and tile scenarios see realistic density.
+LAT_RANGE = (49.0, 54.8)
+LNG_RANGE = (14.1, 24.1)
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+class Dataset(NamedTuple):
+    db: FakeDatabase
+    user_ids: List[str]
+    hot_user: str
+    memory_ids: List[str]
+    shared_memory_ids: List[str]
+
+def seed(
+    users: int = 500,
+    memories: int = 10_000,
+    photos: int = 100_000,
+    shares: int = 1_000,
+    friend_degree: int = 50,
+    share_fanout: int = 0,
+    random_seed: int = 0,
+) -> Dataset:
+    """Build a fake database around one "hot" user.
+
+    The hot user owns ``memories`` memories carrying ``photos`` photos between them, is
+    friends with ``friend_degree`` users and has ``shares`` of their memories shared with
+    them. Every other user gets up to ``friend_degree`` random friendships of their own.
+    The hot user's first memory is shared with ``share_fanout`` other users.
+    """
+    rng = random.Random(random_seed)
+    db = FakeDatabase()
+    user_ids = [f"00000000-0000-4000-8000-{i:012d}" for i in range(users)]
+    hot_user = user_ids[0]
+
+    def timestamp() -> str:
+        return (EPOCH + timedelta(seconds=rng.randrange(5 * 365 * 86400))).isoformat()
+
+    def location() -> str:
+        return point_ewkb(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE))
+
+    db.insert_rows("profiles", [
+        {
+            "id": user_id,
+            "email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "full_name": f"User {i}",
+            "avatar_url": None,
+        }
+        for i, user_id in enumerate(user_ids)
+    ])
+
+    friends = user_ids[1:friend_degree + 1]
+    edges = {(hot_user, f) for f in friends}
+    for user_id in user_ids[1:]:
+        for other in rng.sample(user_ids[1:], min(friend_degree, users - 1)):
+            if other != user_id and (other, user_id) not in edges:
+                edges.add((user_id, other))
+    db.insert_rows("friendships", [
+        {"user_id": a, "friend_id": b, "status": "accepted"} for a, b in sorted(edges)
+    ])
+
+    owned = db.insert_rows("memories", [
+        {
+            "title": f"Memory {i}",
+            "description": "Seeded for benchmarks",
+            "location": location(),
+            "created_by": hot_user,
+            "created_at": timestamp(),
+        }
+        for i in range(memories)
+    ])
+    memory_ids = [m["id"] for m in owned]
+
+    db.insert_rows("photos", [
+        {
+            "memory_id": memory_ids[i % len(memory_ids)],
+            "url": f"https://storage.invalid/storage/v1/object/public/photos/{hot_user}/{i}.jpg",
+            "uploaded_by": hot_user,
+            "uploaded_at": timestamp(),
+        }
+        for i in range(photos if memory_ids else 0)
+    ])
+
+    shared_memory_ids: List[str] = []
+    if friends and shares:
+        foreign = db.insert_rows("memories", [
+            {
+                "title": f"Shared memory {i}",
+                "description": None,
+                "location": location(),
+                "created_by": friends[i % len(friends)],
+                "created_at": timestamp(),
+            }
+            for i in range(shares)
+        ])
+        shared_memory_ids = [m["id"] for m in foreign]
+        db.insert_rows("memory_shares", [
+            {
+                "memory_id": m["id"],
+                "shared_with": hot_user,
+                "shared_by": m["created_by"],
+                "shared_at": timestamp(),
+            }
+            for m in foreign
+        ])
+
+    if memory_ids and share_fanout:
+        db.insert_rows("memory_shares", [
+            {"memory_id": memory_ids[0], "shared_with": user_id, "shared_by": hot_user, "shared_at": timestamp()}
+            for user_id in user_ids[1:share_fanout + 1]
+        ])
+
+    return Dataset(db, user_ids, hot_user, memory_ids, shared_memory_ids)
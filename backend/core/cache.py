@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Protocol, Tuple, TypeVar
+
+from backend.core.config import settings
+
+T = TypeVar("T")
+
+MISSING = object()
+DERIVED_SUFFIX = "#derived"
+
+class CacheBackend(Protocol):
+    """Storage used by ``Cache``; implementations must be safe to call from worker threads."""
+
+    def get(self, key: str) -> Any: ...
+    def set(self, key: str, value: Any, ttl: float) -> None: ...
+    def delete(self, keys: Iterable[str]) -> None: ...
+    def clear(self) -> None: ...
+
+class MemoryBackend:
+    """In-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+class NullBackend:
+    """Backend that stores nothing, used when caching is disabled."""
+
+    def get(self, key: str) -> Any:
+        return MISSING
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        pass
+
+    def delete(self, keys: Iterable[str]) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+class Cache:
+    """Read-through cache for service reads with hit/miss counters.
+
+    Loads are single-flight: concurrent misses on the same key wait for the one in-flight
+    ``loader`` and share its result (or exception) instead of each querying the backend.
+    ``invalidate`` may be called from worker threads, so the in-flight table is only
+    changed under a lock.
+    """
+
+    def __init__(self, backend: CacheBackend, default_ttl: float) -> None:
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._inflight_lock = threading.Lock()
+        self._generations: Dict[str, int] = {}
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[T]], ttl: Optional[float] = None) -> T:
+        """Return the cached value for ``key`` or await ``loader`` and cache its result."""
+        while True:
+            value = self.backend.get(key)
+            if value is not MISSING:
+                self.hits += 1
+                return value
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The leading caller was cancelled: retry, possibly becoming the leader.
+                if not pending.cancelled():
+                    raise
+
+        self.misses += 1
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        with self._inflight_lock:
+            self._inflight[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        else:
+            # An invalidation during the load detaches the future; don't cache what it read.
+            with self._inflight_lock:
+                if self._detach(key, future):
+                    self.backend.set(key, value, self.default_ttl if ttl is None else ttl)
+            future.set_result(value)
+            return value
+        finally:
+            with self._inflight_lock:
+                self._detach(key, future)
+
+    def _detach(self, key: str, future: "asyncio.Future[Any]") -> bool:
+        """Remove ``future`` from the in-flight table if it is still the load for ``key``; hold the lock."""
+        if self._inflight.get(key) is not future:
+            return False
+        del self._inflight[key]
+        return True
+
+    def derive(self, key: str, value: Any, compute: Callable[[Any], T]) -> T:
+        """Return ``compute(value)``, memoized next to ``key`` while ``value`` is the object cached there.
+
+        The memo is invalidated together with its entry; values that are not cached, e.g. with
+        caching disabled, are computed on every call and never retained.
+        """
+        if self.backend.get(key) is not value:
+            return compute(value)
+        derived_key = key + DERIVED_SUFFIX
+        memo = self.backend.get(derived_key)
+        if memo is not MISSING and memo[0] is value:
+            return memo[1]
+        result = compute(value)
+        self.backend.set(derived_key, (value, result), self.default_ttl)
+        return result
+
+    def invalidate(self, *keys: str) -> None:
+        with self._inflight_lock:
+            for key in keys:
+                self._inflight.pop(key, None)
+        self.backend.delete([*keys, *(key + DERIVED_SUFFIX for key in keys)])
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def bump(self, *namespaces: str) -> None:
+        """Invalidate whole namespaces in O(1): keys built from the old generation are never read again."""
+        for namespace in namespaces:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def clear(self) -> None:
+        with self._inflight_lock:
+            self._inflight.clear()
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": getattr(self.backend, "evictions", 0),
+        }
+
+def _make_backend() -> CacheBackend:
+    if settings.cache_backend == "none":
+        return NullBackend()
+    return MemoryBackend(settings.cache_max_entries)
+
+cache = Cache(_make_backend(), settings.cache_ttl)
+
+def profile_key(user_id: str) -> str:
+    return f"profile:{user_id}"
+
+def photos_key(memory_id: str) -> str:
+    return f"photos:{memory_id}"
+
+def memories_key(owner_id: str) -> str:
+    return f"memories:{owner_id}"
+
+def shared_memories_key(user_id: str) -> str:
+    return f"shared:{user_id}"
+
+def nearby_key(user_id: str) -> str:
+    return f"nearby:{user_id}"
+
+def owner_key(memory_id: str) -> str:
+    return f"owner:{memory_id}"
+
+def shares_key(memory_id: str) -> str:
+    return f"shares:{memory_id}"
+
+def tiles_namespace(user_id: str) -> str:
+    return f"tiles:{user_id}"
+
+def tile_key(user_id: str, z: int, x: int, y: int) -> str:
+    return f"tile:{user_id}:{cache.generation(tiles_namespace(user_id))}:{z}/{x}/{y}"
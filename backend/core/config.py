@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl
-from typing import List, Union
+from typing import List, Literal, Optional, Union
 import json
 
 class Settings(BaseSettings):
@@ -9,6 +9,34 @@ class Settings(BaseSettings):
     supabase_service_role_key: str
     database_url: str
     allowed_origins: Union[str, List[str]] = []
+    db_backend: Literal["postgrest", "postgres"] = "postgrest"
+    db_max_workers: int = 16
+    db_pool_size: int = 16
+    db_max_overflow: int = 4
+    db_pool_recycle: int = 1800
+    db_prepare_threshold: Optional[int] = 5
+    db_statement_cache_size: int = 100
+    defer_storage_cleanup: bool = False
+    storage_remove_attempts: int = 3
+    max_upload_bytes: int = 20 * 1024 * 1024
+    max_avatar_bytes: int = 5 * 1024 * 1024
+    upload_chunk_bytes: int = 1024 * 1024
+    upload_concurrency: int = 4
+    max_batch_files: int = 50
+    user_search_limit: int = 20
+    friend_cache_ttl: int = 300
+    cache_backend: Literal["memory", "none"] = "memory"
+    cache_ttl: int = 60
+    cache_max_entries: int = 10_000
+    page_size: int = 50
+    max_page_size: int = 500
+    export_batch_size: int = 200
+    max_import_bytes: int = 50 * 1024 * 1024
+    import_batch_size: int = 500
+    image_workers: int = 2
+    metrics_enabled: bool = True
+    slow_request_ms: int = 500
+    image_webp: bool = True
 
     model_config = {
         "env_file": ".env",
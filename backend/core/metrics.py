@@ -0,0 +1,122 @@
+"""Process-local request and backend call metrics, exported in the Prometheus text format.
+
+Backend calls are timed by ``db.instrumented`` and attributed to the current request through
+a context variable, which ``run_sync`` carries into the worker threads.
+"""
+
+import bisect
+import threading
+from contextvars import ContextVar
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from backend.core.cache import cache
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Call(NamedTuple):
+    kind: str
+    target: str
+    method: str
+    seconds: float
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}.{self.target}.{self.method}"
+
+request_calls: ContextVar[Optional[List[Call]]] = ContextVar("request_calls", default=None)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str]) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_labels(self.labels, k)} {v}" for k, v in items]
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        # Per series: one count per bucket (non-cumulative), then +Inf, then the sum.
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip((*map(str, self.buckets), "+Inf"), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels((*self.labels, 'le'), (*key, bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+REQUEST_SECONDS = Histogram(
+    "trailback_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status"),
+)
+BACKEND_CALLS = Counter(
+    "trailback_backend_calls_total", "PostgREST, rpc and storage calls by table or bucket.", ("kind", "target", "method"),
+)
+BACKEND_SECONDS = Counter(
+    "trailback_backend_call_seconds_total", "Time spent in backend calls by table or bucket.", ("kind", "target", "method"),
+)
+
+def record_call(call: Call) -> None:
+    """Count a finished backend call and attach it to the current request, if any."""
+    key = (call.kind, call.target, call.method)
+    BACKEND_CALLS.inc(key)
+    BACKEND_SECONDS.inc(key, call.seconds)
+    calls = request_calls.get()
+    if calls is not None:
+        calls.append(call)
+
+def server_timing(calls: Sequence[Call], total: float) -> str:
+    """Server-Timing header value with one entry per distinct call, plus the total."""
+    grouped: Dict[str, List[float]] = {}
+    for call in calls:
+        grouped.setdefault(call.name, []).append(call.seconds)
+    entries = [
+        f'{name};dur={sum(times) * 1000:.1f};desc="{len(times)}x"'
+        for name, times in grouped.items()
+    ]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+def render() -> str:
+    lines = [*REQUEST_SECONDS.render(), *BACKEND_CALLS.render(), *BACKEND_SECONDS.render()]
+    for name, value in cache.stats().items():
+        metric = f"trailback_cache_{name}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
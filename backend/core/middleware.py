@@ -0,0 +1,122 @@
+import logging
+import time
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.routing import Match, compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.core.config import settings
+from backend.core.metrics import REQUEST_SECONDS, request_calls, server_timing
+from backend.utils.storage import FileTooLargeError
+
+logger = logging.getLogger(__name__)
+
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+def _route_template(scope: Scope) -> str:
+    """Path template of the matched route, so metrics are not split per id."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    for route in scope["app"].router.routes:
+        # Included routers have no single path; requests refused before routing land here.
+        path = getattr(route, "path", None)
+        if path is not None and route.matches(scope)[0] == Match.FULL:
+            return path
+    return "unmatched"
+
+class MetricsMiddleware:
+    """Times each request and the backend calls it makes.
+
+    Adds a Server-Timing header, records the route latency histogram and logs requests
+    slower than ``settings.slow_request_ms`` with their call breakdown. Pure ASGI, so
+    streaming responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        calls = []
+        token = request_calls.set(calls)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(calls, time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_calls.reset(token)
+            elapsed = time.perf_counter() - start
+            route = _route_template(scope)
+            REQUEST_SECONDS.observe((scope["method"], route, str(status)), elapsed)
+            if elapsed * 1000 >= settings.slow_request_ms:
+                logger.warning(
+                    "Slow request %s %s took %.0f ms with %d backend calls: %s",
+                    scope["method"], scope["path"], elapsed * 1000, len(calls),
+                    ", ".join(f"{c.name} {c.seconds * 1000:.0f} ms" for c in calls),
+                )
+
+class UploadLimitMiddleware:
+    """Refuses upload bodies over their route's limit before Starlette spools them.
+
+    ``limits`` maps route path templates to the largest file they accept; they are matched
+    against the raw path because the middleware runs before routing. A declared
+    Content-Length over the limit (plus multipart overhead) is answered with 413 without
+    reading the body; bodies without one are counted as they arrive and cut off with 413
+    as soon as they pass it.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]) -> None:
+        self.app = app
+        self.limits = [(compile_path(path)[0], max_bytes) for path, max_bytes in limits.items()]
+
+    def _limit(self, path: str) -> Optional[int]:
+        for regex, max_bytes in self.limits:
+            if regex.match(path):
+                return max_bytes
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            await self.app(scope, receive, send)
+            return
+        max_file_bytes = self._limit(scope["path"])
+        if max_file_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_body_bytes = max_file_bytes + MULTIPART_OVERHEAD_BYTES
+        detail = str(FileTooLargeError(max_file_bytes))
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > max_body_bytes:
+            await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_bytes:
+                    # Re-raised by FastAPI's body parsing and answered by its exception handler.
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
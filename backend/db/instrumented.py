@@ -0,0 +1,92 @@
+import time
+from typing import Any
+
+from backend.core.metrics import Call, record_call
+
+BUILDER_METHODS = ("select", "insert", "update", "upsert", "delete")
+STORAGE_CALLS = frozenset({"upload", "update", "remove", "download", "list", "move", "copy", "create_signed_url"})
+
+class _TracedQuery:
+    """Proxy around a query builder that times ``execute()`` and labels it with its table and verb."""
+
+    __slots__ = ("_query", "_kind", "_target", "_method")
+
+    def __init__(self, query: Any, kind: str, target: str, method: str) -> None:
+        self._query = query
+        self._kind = kind
+        self._target = target
+        self._method = method
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr == "execute":
+            return self._execute
+        value = getattr(self._query, attr)
+        if not callable(value):
+            return value
+
+        def chained(*args: Any, **kwargs: Any) -> Any:
+            result = value(*args, **kwargs)
+            if not hasattr(result, "execute"):
+                return result
+            method = attr if attr in BUILDER_METHODS else self._method
+            return _TracedQuery(result, self._kind, self._target, method)
+
+        return chained
+
+    def _execute(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return self._query.execute()
+        finally:
+            record_call(Call(self._kind, self._target, self._method, time.perf_counter() - start))
+
+class _TracedBucket:
+    __slots__ = ("_bucket", "_name")
+
+    def __init__(self, bucket: Any, name: str) -> None:
+        self._bucket = bucket
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._bucket, attr)
+        if attr not in STORAGE_CALLS:
+            return value
+
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return value(*args, **kwargs)
+            finally:
+                record_call(Call("storage", self._name, attr, time.perf_counter() - start))
+
+        return timed
+
+class _TracedStorage:
+    __slots__ = ("_storage",)
+
+    def __init__(self, storage: Any) -> None:
+        self._storage = storage
+
+    def from_(self, bucket: str) -> _TracedBucket:
+        return _TracedBucket(self._storage.from_(bucket), bucket)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._storage, attr)
+
+class InstrumentedClient:
+    """Wraps a Supabase-compatible client so every table, rpc and storage call is timed and counted."""
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+        self.storage = _TracedStorage(client.storage)
+
+    def table(self, name: str) -> _TracedQuery:
+        return _TracedQuery(self._client.table(name), "table", name, "select")
+
+    from_ = table
+
+    def rpc(self, name: str, params: Any = None, *args: Any, **kwargs: Any) -> _TracedQuery:
+        return _TracedQuery(self._client.rpc(name, params or {}, *args, **kwargs), "rpc", name, "call")
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._client, attr)
@@ -0,0 +1,309 @@
+"""Direct, pooled Postgres backend exposing the subset of the Supabase client the services use.
+
+``PostgresClient`` mirrors ``Client.table(...)`` / ``Client.rpc(...)`` query builders closely
+enough that service modules run unchanged, but compiles each chain to a single SQL
+statement executed over a SQLAlchemy connection pool instead of an HTTP round trip to
+PostgREST. Storage calls are still delegated to the Supabase client.
+"""
+
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID
+
+from postgrest.exceptions import APIError
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from backend.core.config import settings
+from backend.db.postgrest_syntax import RELATIONS, Embed, Logic, parse_logic, parse_order, parse_select
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "like": "like", "ilike": "ilike"}
+
+class Result(NamedTuple):
+    data: Any
+    count: Optional[int] = None
+
+def _ident(name: str) -> str:
+    name = name.strip()
+    if not IDENTIFIER.match(name):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return f'"{name}"'
+
+def _jsonable(value: Any) -> Any:
+    """Convert driver values to what PostgREST would have returned in JSON."""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+class _Params:
+    def __init__(self) -> None:
+        self.values: Dict[str, Any] = {}
+
+    def add(self, value: Any) -> str:
+        name = f"p{len(self.values)}"
+        self.values[name] = value
+        return f":{name}"
+
+def _condition(column: str, op: str, value: Any, params: _Params) -> str:
+    col = f"t.{_ident(column)}"
+    if op == "is":
+        keyword = {"null": "null", "true": "true", "false": "false"}.get(str(value).lower())
+        if keyword is None:
+            raise ValueError(f"Invalid is value: {value!r}")
+        return f"{col} is {keyword}"
+    if op == "in":
+        values = list(value)
+        if not values:
+            return "false"
+        return f"{col} in ({', '.join(params.add(v) for v in values)})"
+    if op not in OPERATORS:
+        raise ValueError(f"Unsupported operator: {op}")
+    return f"{col} {OPERATORS[op]} {params.add(value)}"
+
+def _logic(logic: Logic, params: _Params) -> str:
+    terms = [
+        _logic(term, params) if isinstance(term, Logic) else _condition(*term, params)
+        for term in logic.terms
+    ]
+    return "(" + f" {logic.joiner} ".join(terms) + ")"
+
+def _columns(table: str, columns: str) -> str:
+    """Compile a select list, embedding related rows as JSON the way PostgREST does."""
+    out = []
+    for item in parse_select(columns):
+        if not isinstance(item, Embed):
+            out.append("t.*" if item == "*" else f"t.{_ident(item)}")
+            continue
+        if (table, item.resource) not in RELATIONS:
+            raise ValueError(f"No relationship between {table} and {item.resource}")
+        local, remote, many = RELATIONS[(table, item.resource)]
+        if item.columns == ["*"]:
+            obj = "to_jsonb(e)"
+        else:
+            obj = "jsonb_build_object(" + ", ".join(f"'{c}', e.{_ident(c)}" for c in item.columns) + ")"
+        source = f"from {_ident(item.resource)} e where e.{_ident(remote)} = t.{_ident(local)}"
+        if many:
+            out.append(f"coalesce((select jsonb_agg({obj}) {source}), '[]'::jsonb) as {_ident(item.resource)}")
+        else:
+            out.append(f"(select {obj} {source}) as {_ident(item.resource)}")
+    return ", ".join(out)
+
+def _order(spec: str) -> str:
+    return ", ".join(
+        f"t.{_ident(term.column)} {'desc' if term.descending else 'asc'}"
+        + (f" nulls {term.nulls}" if term.nulls else "")
+        for term in parse_order(spec)
+    )
+
+class QueryBuilder:
+    """Chainable builder mirroring the PostgREST request builder of supabase-py."""
+
+    def __init__(self, engine: Engine, table: str) -> None:
+        self._engine = engine
+        self._table = table
+        self._method = "select"
+        self._columns = "*"
+        self._payload: Any = None
+        self._returning = True
+        self._filters: List[Tuple[str, Tuple[Any, ...]]] = []
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+        self._single = False
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "QueryBuilder":
+        self._columns = ",".join(columns) or "*"
+        return self
+
+    def insert(self, json: Any, *, returning: Any = "representation", **_: Any) -> "QueryBuilder":
+        self._method, self._payload = "insert", json
+        self._returning = str(getattr(returning, "value", returning)) != "minimal"
+        return self
+
+    def update(self, json: Dict[str, Any], *, returning: Any = "representation", **_: Any) -> "QueryBuilder":
+        self._method, self._payload = "update", json
+        self._returning = str(getattr(returning, "value", returning)) != "minimal"
+        return self
+
+    def delete(self, *, returning: Any = "representation", **_: Any) -> "QueryBuilder":
+        self._method = "delete"
+        self._returning = str(getattr(returning, "value", returning)) != "minimal"
+        return self
+
+    def filter(self, column: str, operator: str, criteria: Any) -> "QueryBuilder":
+        self._filters.append(("op", (column, operator, criteria)))
+        return self
+
+    def eq(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "lte", value)
+
+    def is_(self, column: str, value: Any) -> "QueryBuilder":
+        return self.filter(column, "is", value)
+
+    def in_(self, column: str, values: Sequence[Any]) -> "QueryBuilder":
+        return self.filter(column, "in", list(values))
+
+    def match(self, query: Dict[str, Any]) -> "QueryBuilder":
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    def or_(self, filters: str) -> "QueryBuilder":
+        self._filters.append(("or", (filters,)))
+        return self
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None) -> "QueryBuilder":
+        spec = column + (".desc" if desc else "")
+        if nullsfirst is not None:
+            spec += ".nullsfirst" if nullsfirst else ".nullslast"
+        self._order.append(spec)
+        return self
+
+    def limit(self, size: int) -> "QueryBuilder":
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int) -> "QueryBuilder":
+        """Rows ``start`` to ``end`` inclusive, as PostgREST's Range header."""
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def single(self) -> "QueryBuilder":
+        self._single = True
+        return self
+
+    def _source(self, params: _Params) -> str:
+        return f"{_ident(self._table)} as t"
+
+    def compile(self) -> Tuple[str, Dict[str, Any]]:
+        """Render the chain as one SQL statement and its bound parameters."""
+        params = _Params()
+        table = self._source(params)
+        where = []
+        for kind, args in self._filters:
+            if kind == "or":
+                where.append(_logic(parse_logic(args[0]), params))
+            else:
+                where.append(_condition(*args, params))
+        where_sql = f" where {' and '.join(where)}" if where else ""
+        returning = " returning t.*" if self._returning or self._single else ""
+
+        if self._method == "insert":
+            rows = self._payload if isinstance(self._payload, list) else [self._payload]
+            columns = list(dict.fromkeys(c for row in rows for c in row))
+            values = ", ".join(
+                "(" + ", ".join(params.add(row[c]) if c in row else "default" for c in columns) + ")"
+                for row in rows
+            )
+            sql = f"insert into {table} ({', '.join(map(_ident, columns))}) values {values}{returning}"
+        elif self._method == "update":
+            assignments = ", ".join(f"{_ident(c)} = {params.add(v)}" for c, v in self._payload.items())
+            sql = f"update {table} set {assignments}{where_sql}{returning}"
+        elif self._method == "delete":
+            sql = f"delete from {table}{where_sql}{returning}"
+        else:
+            sql = f"select {_columns(self._table, self._columns)} from {table}{where_sql}"
+            if self._order:
+                sql += " order by " + ", ".join(_order(spec) for spec in self._order)
+            if self._limit is not None:
+                sql += f" limit {int(self._limit)}"
+            if self._offset:
+                sql += f" offset {int(self._offset)}"
+        return sql, params.values
+
+    def execute(self) -> Result:
+        sql, params = self.compile()
+        with self._engine.begin() as conn:
+            result = conn.execute(text(sql), params)
+            rows = [
+                {key: _jsonable(value) for key, value in row.items()}
+                for row in result.mappings()
+            ] if result.returns_rows else []
+        if self._single:
+            if len(rows) != 1:
+                raise APIError({
+                    "code": "PGRST116",
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "details": f"The result contains {len(rows)} rows",
+                    "hint": None,
+                })
+            return Result(rows[0])
+        return Result(rows)
+
+class RpcBuilder(QueryBuilder):
+    """Call of a set-returning SQL function with named arguments, like ``Client.rpc``.
+
+    The function result can be filtered, ordered and limited like a table.
+    """
+
+    def __init__(self, engine: Engine, name: str, args: Dict[str, Any]) -> None:
+        super().__init__(engine, name)
+        self._args = args
+
+    def _source(self, params: _Params) -> str:
+        args = ", ".join(f"{_ident(k)} => {params.add(v)}" for k, v in self._args.items())
+        return f"{_ident(self._table)}({args}) as t"
+
+class PostgresClient:
+    """Supabase-compatible client whose table and rpc queries go straight to Postgres."""
+
+    def __init__(self, engine: Engine, storage: Any) -> None:
+        self.engine = engine
+        self.storage = storage
+
+    def table(self, name: str) -> QueryBuilder:
+        return QueryBuilder(self.engine, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> RpcBuilder:
+        return RpcBuilder(self.engine, name, params or {})
+
+def _engine_url(url: str) -> str:
+    for prefix in ("postgres://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg://" + url[len(prefix):]
+    return url
+
+@lru_cache()
+def get_engine() -> Engine:
+    """Pooled engine for ``settings.database_url`` with server-side prepared statements."""
+    engine = create_engine(
+        _engine_url(settings.database_url),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args={"prepare_threshold": settings.db_prepare_threshold},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _configure(dbapi_connection: Any, _: Any) -> None:
+        dbapi_connection.prepared_max = settings.db_statement_cache_size
+
+    return engine
@@ -0,0 +1,104 @@
+"""Parsing of the PostgREST query syntax produced by the supabase-py builders.
+
+Shared by the direct Postgres backend, which compiles it to SQL, and by the in-memory
+client used for benchmarks, which evaluates it against Python rows.
+"""
+
+import re
+from typing import Any, List, NamedTuple, Optional, Union
+
+# (table, embedded resource) -> (local column, remote column, one-to-many)
+RELATIONS = {
+    ("memory_shares", "memories"): ("memory_id", "id", False),
+    ("photos", "memories"): ("memory_id", "id", False),
+    ("memories", "photos"): ("id", "memory_id", True),
+    ("memories", "memory_shares"): ("id", "memory_id", True),
+}
+
+class Condition(NamedTuple):
+    column: str
+    op: str
+    value: Any
+
+class Logic(NamedTuple):
+    joiner: str
+    terms: List[Union[Condition, "Logic"]]
+
+class Embed(NamedTuple):
+    resource: str
+    columns: List[str]
+
+class OrderTerm(NamedTuple):
+    column: str
+    descending: bool
+    nulls: Optional[str]
+
+def split_top_level(expr: str) -> List[str]:
+    """Split on commas that are not inside parentheses or double quotes."""
+    parts, depth, quoted, start, i = [], 0, False, 0, 0
+    while i < len(expr):
+        ch = expr[i]
+        if quoted and ch == "\\":
+            i += 2
+            continue
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and not depth and ch == ",":
+            parts.append(expr[start:i])
+            start = i + 1
+        i += 1
+    parts.append(expr[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+def parse_logic(expr: str, joiner: str = "or") -> Logic:
+    """Parse a logic tree such as ``a.eq.1,and(b.eq.2,c.lt.3)``."""
+    terms: List[Union[Condition, Logic]] = []
+    for term in split_top_level(expr):
+        nested = re.match(r"^(and|or)\((.*)\)$", term, re.S)
+        if nested:
+            terms.append(parse_logic(nested.group(2), nested.group(1)))
+            continue
+        column, op, value = term.split(".", 2)
+        if op == "in":
+            inner = value.strip()
+            if not (inner.startswith("(") and inner.endswith(")")):
+                raise ValueError(f"Invalid in filter: {term!r}")
+            terms.append(Condition(column, "in", [unquote(v) for v in split_top_level(inner[1:-1])]))
+        else:
+            terms.append(Condition(column, op, unquote(value)))
+    return Logic(joiner, terms)
+
+def parse_select(columns: str) -> List[Union[str, Embed]]:
+    """Parse a select list into column names and one level of embedded resources."""
+    out: List[Union[str, Embed]] = []
+    for item in split_top_level(columns):
+        embed = re.match(r"^([A-Za-z_][A-Za-z0-9_]*)\((.*)\)$", item, re.S)
+        if embed:
+            out.append(Embed(embed.group(1), split_top_level(embed.group(2))))
+        else:
+            out.append(item)
+    return out
+
+def parse_order(spec: str) -> List[OrderTerm]:
+    terms = []
+    for part in split_top_level(spec):
+        column, *modifiers = part.split(".")
+        descending, nulls = False, None
+        for modifier in modifiers:
+            if modifier in ("asc", "desc"):
+                descending = modifier == "desc"
+            elif modifier in ("nullsfirst", "nullslast"):
+                nulls = modifier[5:]
+            else:
+                raise ValueError(f"Invalid order modifier: {modifier}")
+        terms.append(OrderTerm(column, descending, nulls))
+    return terms
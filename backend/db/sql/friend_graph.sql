@@ -0,0 +1,44 @@
+-- Friendships of a user joined with the other user's profile, for GET /friends/graph
+-- (friend_service.get_friend_graph). One row per friendship in either direction; the
+-- profile columns are null when the other user has no profile row.
+
+create index if not exists friendships_user_id_idx
+    on public.friendships (user_id);
+
+create index if not exists friendships_friend_id_idx
+    on public.friendships (friend_id);
+
+create or replace function public.friend_graph(p_user_id uuid)
+returns table (
+    user_id text,
+    friend_id text,
+    status text,
+    id text,
+    username text,
+    full_name text,
+    avatar_url text,
+    avatar_thumbnail_url text,
+    avatar_medium_url text,
+    avatar_webp_url text
+)
+language sql
+stable
+as $$
+    select
+        f.user_id::text,
+        f.friend_id::text,
+        f.status::text,
+        o.id::text,
+        p.username::text,
+        p.full_name::text,
+        p.avatar_url::text,
+        p.avatar_thumbnail_url::text,
+        p.avatar_medium_url::text,
+        p.avatar_webp_url::text
+    from public.friendships f
+    cross join lateral (
+        select case when f.user_id = p_user_id then f.friend_id else f.user_id end as id
+    ) o
+    left join public.profiles p on p.id = o.id
+    where f.user_id = p_user_id or f.friend_id = p_user_id;
+$$;
@@ -0,0 +1,13 @@
+-- Resized derivatives generated in the background after photo and avatar uploads
+-- (utils.images.schedule_derivatives). Columns stay null until the worker finishes,
+-- and for files uploaded directly to storage by the client.
+
+alter table public.photos
+    add column if not exists thumbnail_url text,
+    add column if not exists medium_url text,
+    add column if not exists webp_url text;
+
+alter table public.profiles
+    add column if not exists avatar_thumbnail_url text,
+    add column if not exists avatar_medium_url text,
+    add column if not exists avatar_webp_url text;
@@ -0,0 +1,41 @@
+-- Memories visible to a user (owned and, optionally, shared with them) whose
+-- location falls inside a lng/lat bounding box. Called through PostgREST as
+-- rpc('memories_in_bbox', ...) by memory_service.list_memories_in_bbox.
+
+create index if not exists memories_location_gist
+    on public.memories using gist (location);
+
+create index if not exists memory_shares_shared_with_idx
+    on public.memory_shares (shared_with, memory_id);
+
+create or replace function public.memories_in_bbox(
+    p_user_id uuid,
+    p_min_lng double precision,
+    p_min_lat double precision,
+    p_max_lng double precision,
+    p_max_lat double precision,
+    p_include_shared boolean default true,
+    p_limit integer default null
+)
+returns setof public.memories
+language sql
+stable
+as $$
+    select m.*
+    from public.memories m
+    where m.location && st_makeenvelope(p_min_lng, p_min_lat, p_max_lng, p_max_lat, 4326)
+      and (
+          m.created_by = p_user_id
+          or (
+              p_include_shared
+              and exists (
+                  select 1
+                  from public.memory_shares s
+                  where s.memory_id = m.id
+                    and s.shared_with = p_user_id
+              )
+          )
+      )
+    order by m.created_at desc
+    limit p_limit;
+$$;
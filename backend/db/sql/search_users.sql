@@ -0,0 +1,43 @@
+-- Ranked user search for GET /users (user_service.list_users). Prefix matches on
+-- username rank first, then trigram similarity; the caller is excluded and the limit
+-- applied in the query. An empty query lists users alphabetically. Both the substring
+-- and the similarity predicate work on lower(username), so the trigram index serves them.
+
+create extension if not exists pg_trgm;
+
+drop index if exists public.profiles_username_trgm_idx;
+drop index if exists public.profiles_username_prefix_idx;
+
+create index if not exists profiles_username_lower_trgm_idx
+    on public.profiles using gin (lower(username) gin_trgm_ops);
+
+create or replace function public.search_users(
+    p_query text default null,
+    p_exclude text default null,
+    p_limit integer default null
+)
+returns table (id text, email text, username text, full_name text, avatar_url text)
+language sql
+stable
+as $$
+    with q as (
+        select
+            nullif(lower(btrim(p_query)), '') as term,
+            replace(replace(replace(lower(btrim(p_query)), '\', '\\'), '%', '\%'), '_', '\_') as pattern
+    )
+    select u.id::text, u.email::text, u.username::text, u.full_name::text, u.avatar_url::text
+    from public.user_profiles_view u, q
+    where (p_exclude is null or u.id::text <> p_exclude)
+      and (
+          q.term is null
+          or lower(u.username) like '%' || q.pattern || '%'
+          or lower(u.username) % q.term
+      )
+    order by
+        case when q.term is null then 0
+             when lower(u.username) like q.pattern || '%' then 0
+             else 1 end,
+        case when q.term is null then 0 else similarity(lower(u.username), q.term) end desc,
+        u.username
+    limit p_limit;
+$$;
@@ -1,10 +1,45 @@
-from functools import lru_cache
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, TypeVar
+
 from supabase import Client, create_client
 from backend.core.config import settings
+from backend.db.instrumented import InstrumentedClient
+from backend.db.postgres import PostgresClient, get_engine
+
+T = TypeVar("T")
 
 @lru_cache()
 def get_supabase() -> Client:
     return create_client(str(settings.supabase_url), settings.supabase_service_role_key)
 
+@lru_cache()
+def get_executor() -> ThreadPoolExecutor:
+    """Bounded worker pool that runs blocking Supabase round trips off the event loop."""
+    return ThreadPoolExecutor(max_workers=settings.db_max_workers, thread_name_prefix="supabase")
+
+async def run_sync(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Await a blocking call in the Supabase worker pool, keeping the caller's context variables."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), ctx.run, partial(func, *args, **kwargs))
+
+async def execute(query: Any) -> Any:
+    """Execute a PostgREST query builder in the Supabase worker pool."""
+    return await run_sync(query.execute)
+
+@lru_cache()
+def get_postgres() -> PostgresClient:
+    """Direct Postgres client for table and rpc queries; storage stays on Supabase."""
+    return PostgresClient(get_engine(), get_supabase().storage)
+
+@lru_cache()
+def get_client() -> Client:
+    """Client selected by DB_BACKEND, wrapped for per-call metrics when METRICS_ENABLED."""
+    client = get_postgres() if settings.db_backend == "postgres" else get_supabase()
+    return InstrumentedClient(client) if settings.metrics_enabled else client
+
 def get_db() -> Client:
-    return get_supabase()
+    return get_client()
@@ -2,7 +2,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.core.config import settings
-from backend.routes import common, memories, photos, users, friends, profile
+from backend.core.middleware import MetricsMiddleware, UploadLimitMiddleware
+from backend.routes import common, memories, photos, users, friends, profile, tiles
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
@@ -12,13 +13,25 @@ def create_app() -> FastAPI:
         version="2.0.0",
     )
 
+    app.add_middleware(
+        UploadLimitMiddleware,
+        limits={
+            "/memories/import": settings.max_import_bytes,
+            "/memories/{memory_id}/upload-photo": settings.max_upload_bytes,
+            "/memories/{memory_id}/upload-photos": settings.max_batch_files * settings.max_upload_bytes,
+            "/profile/avatar": settings.max_avatar_bytes,
+        },
+    )
     app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.allowed_origins,
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag", "X-Next-Cursor", "Server-Timing"],
     )
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
 
     for router in (
         common.router,
@@ -27,6 +40,7 @@ def create_app() -> FastAPI:
         users.router,
         profile.router,
         friends.router,
+        tiles.router,
     ):
         app.include_router(router)
 
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Response, status
 
+from backend.core import metrics
+
 router = APIRouter(tags=["Meta"])
 
 @router.get("/", include_in_schema=False)
@@ -13,3 +15,7 @@ async def health() -> dict:
 @router.get("/favicon.ico", include_in_schema=False, status_code=status.HTTP_204_NO_CONTENT)
 async def favicon() -> Response:
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
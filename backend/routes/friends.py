@@ -1,29 +1,50 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Request, Response, status, HTTPException
+from pydantic import TypeAdapter
 from supabase import Client
 
 from backend.db.supabase import get_db
-from backend.schemas.friend import FriendOut
+from backend.schemas.friend import FriendGraphOut, FriendOut
 from backend.schemas.response import MessageResponse
 from backend.services import friend_service
+from backend.utils.http import PageRequest, conditional_json, json_response, page_params, page_response
 
 router = APIRouter(prefix="/friends", tags=["Friends"])
 
+friend_list_adapter = TypeAdapter(List[FriendOut])
+friend_graph_adapter = TypeAdapter(FriendGraphOut)
+
 @router.get("/", response_model=List[FriendOut])
-async def list_friends(user_id: str, db: Client = Depends(get_db)) -> List[FriendOut]:
-    return friend_service.list_friends(db, user_id)
+async def list_friends(
+    request: Request,
+    user_id: str,
+    paging: Optional[PageRequest] = Depends(page_params),
+    db: Client = Depends(get_db),
+) -> Response:
+    if paging:
+        try:
+            page = await friend_service.list_friends_page(db, user_id, paging.limit, paging.cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return page_response(page, friend_list_adapter)
+    friends = await friend_service.list_friends(db, user_id)
+    return conditional_json(request, friends, friend_list_adapter)
+
+@router.get("/graph", response_model=FriendGraphOut)
+async def get_friend_graph(user_id: str, db: Client = Depends(get_db)) -> Response:
+    return json_response(await friend_service.get_friend_graph(db, user_id), friend_graph_adapter)
 
 @router.post("/request", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
 async def send_friend_request(user_id: str, friend_id: str, db: Client = Depends(get_db)) -> MessageResponse:
-    friend_service.send_request(db, user_id, friend_id)
+    await friend_service.send_request(db, user_id, friend_id)
     return MessageResponse(message="Zaproszenie wysłane")
 
 @router.post("/accept", response_model=MessageResponse)
 async def accept_friend_request(user_id: str, friend_id: str, db: Client = Depends(get_db)) -> MessageResponse:
-    friend_service.accept_request(db, user_id, friend_id)
+    await friend_service.accept_request(db, user_id, friend_id)
     return MessageResponse(message="Zaproszenie zaakceptowane")
 
 @router.delete("/remove", response_model=MessageResponse)
 async def remove_friend(user_id: str, friend_id: str, db: Client = Depends(get_db)) -> MessageResponse:
-    friend_service.remove_friend(db, user_id, friend_id)
+    await friend_service.remove_friend(db, user_id, friend_id)
     return MessageResponse(message="Znajomy usunięty")
@@ -1,32 +1,210 @@
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body, UploadFile, File
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status, Body, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from supabase import Client
 
+from backend.core.cache import memories_key, shared_memories_key
+from backend.core.config import settings
 from backend.db.supabase import get_db
-from backend.schemas.memory import MemoryCreate, MemoryOut, MemoryShareOut
+from backend.schemas.memory import (
+    BoundingBox,
+    MemoryClustersOut,
+    MemoryCreate,
+    MemoryOut,
+    MemoryShareOut,
+    NearbyMemoryOut,
+    SharedMemoryOut,
+)
+from backend.schemas.photo import PhotoUploadResult
 from backend.schemas.response import MessageResponse
 from backend.services import memory_service
-from backend.services.photo_service import upload_photo_to_memory
+from backend.services.photo_service import upload_photo_to_memory, upload_photos_to_memory
+from backend.utils.export import GEOJSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE, geojson_stream, ndjson_stream
+from backend.utils.http import PageRequest, conditional_json, json_response, page_params, page_response
+from backend.utils.importers import PARSERS
+from backend.utils.points import BINARY_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE, to_binary, to_columnar
+from backend.utils.storage import IMPORT_MIME_TYPES, FileTooLargeError, check_upload, delete_files_in_background, file_extension
 
 router = APIRouter(prefix="/memories", tags=["Memories"])
 
+MAX_BBOX_RESULTS = 5000
+
+memory_list_adapter = TypeAdapter(List[MemoryOut])
+shared_memory_list_adapter = TypeAdapter(List[SharedMemoryOut])
+share_list_adapter = TypeAdapter(List[MemoryShareOut])
+clusters_adapter = TypeAdapter(MemoryClustersOut)
+nearby_list_adapter = TypeAdapter(List[NearbyMemoryOut])
+
+def bbox_params(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+) -> BoundingBox:
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="Nieprawidłowy obszar mapy")
+    return BoundingBox(min_lat=min_lat, min_lng=min_lng, max_lat=max_lat, max_lng=max_lng)
+
 @router.get("/", response_model=List[MemoryOut])
-async def list_memories(user_id: str, db: Client = Depends(get_db)) -> List[MemoryOut]:
-    return memory_service.list_memories(db, user_id)
+async def list_memories(
+    request: Request,
+    user_id: str,
+    paging: Optional[PageRequest] = Depends(page_params),
+    db: Client = Depends(get_db),
+) -> Response:
+    if paging:
+        try:
+            page = await memory_service.list_memories_page(db, user_id, paging.limit, paging.cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return page_response(page, memory_list_adapter)
+    memories = await memory_service.list_memories(db, user_id)
+    return conditional_json(request, memories, memory_list_adapter, memories_key(user_id))
+
+@router.get("/shared", response_model=List[SharedMemoryOut])
+async def list_shared_memories(
+    request: Request,
+    user_id: str,
+    paging: Optional[PageRequest] = Depends(page_params),
+    db: Client = Depends(get_db),
+) -> Response:
+    if paging:
+        try:
+            page = await memory_service.list_shared_memories_page(db, user_id, paging.limit, paging.cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return page_response(page, shared_memory_list_adapter)
+    memories = await memory_service.list_shared_memories(db, user_id)
+    return conditional_json(request, memories, shared_memory_list_adapter, shared_memories_key(user_id))
+
+@router.get("/in-bbox", response_model=List[MemoryOut])
+async def list_memories_in_bbox(
+    user_id: str,
+    bbox: BoundingBox = Depends(bbox_params),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_BBOX_RESULTS),
+    include_shared: bool = True,
+    db: Client = Depends(get_db),
+) -> Response:
+    memories = await memory_service.list_memories_in_bbox(
+        db, user_id, bbox, limit or MAX_BBOX_RESULTS, include_shared
+    )
+    return json_response(memories, memory_list_adapter)
 
-@router.get("/shared", response_model=List[MemoryOut])
-async def list_shared_memories(user_id: str, db: Client = Depends(get_db)) -> List[MemoryOut]:
-    return memory_service.list_shared_memories(db, user_id)
+@router.get("/clusters", response_model=MemoryClustersOut)
+async def cluster_memories(
+    user_id: str,
+    zoom: int = Query(..., ge=0, le=22),
+    bbox: BoundingBox = Depends(bbox_params),
+    min_cluster_size: int = Query(2, ge=2),
+    include_shared: bool = True,
+    db: Client = Depends(get_db),
+) -> Response:
+    clusters = await memory_service.cluster_memories(
+        db, user_id, bbox, zoom, min_cluster_size, include_shared
+    )
+    return json_response(clusters, clusters_adapter)
+
+@router.get("/nearby", response_model=List[NearbyMemoryOut])
+async def list_nearby_memories(
+    user_id: str,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(5000, gt=0, le=20_037_509),
+    limit: int = Query(50, ge=1, le=500),
+    db: Client = Depends(get_db),
+) -> Response:
+    memories = await memory_service.list_nearby_memories(db, user_id, lat, lng, radius_m, limit)
+    return json_response(memories, nearby_list_adapter)
+
+@router.get("/points", responses={200: {"content": {COLUMNAR_MEDIA_TYPE: {}, BINARY_MEDIA_TYPE: {}}}})
+async def map_points(
+    request: Request,
+    user_id: str,
+    min_lat: float = Query(-90, ge=-90, le=90),
+    min_lng: float = Query(-180, ge=-180, le=180),
+    max_lat: float = Query(90, ge=-90, le=90),
+    max_lng: float = Query(180, ge=-180, le=180),
+    format: Optional[Literal["columnar", "binary"]] = None,
+    include_shared: bool = True,
+    db: Client = Depends(get_db),
+) -> Response:
+    """Compact map points (id, title, lat, lng) as parallel JSON arrays or a packed float32 binary.
+
+    The representation is chosen by ``format`` or, failing that, by the Accept header.
+    """
+    bbox = bbox_params(min_lat, min_lng, max_lat, max_lng)
+    points = await memory_service.map_points(db, user_id, bbox, include_shared)
+    if format is None:
+        format = "binary" if BINARY_MEDIA_TYPE in request.headers.get("accept", "") else "columnar"
+    headers = {"Vary": "Accept"}
+    if format == "binary":
+        return Response(content=to_binary(points), media_type=BINARY_MEDIA_TYPE, headers=headers)
+    return Response(content=orjson.dumps(to_columnar(points)), media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
+
+@router.get("/export", responses={200: {"content": {GEOJSON_MEDIA_TYPE: {}, NDJSON_MEDIA_TYPE: {}}}})
+async def export_memories(
+    user_id: str,
+    format: Literal["geojson", "ndjson"] = "geojson",
+    db: Client = Depends(get_db),
+) -> StreamingResponse:
+    """Stream all of a user's memories with their photos as a GeoJSON FeatureCollection or NDJSON."""
+    items = memory_service.iter_memories_with_photos(db, user_id)
+    if format == "ndjson":
+        body, media_type = ndjson_stream(items), NDJSON_MEDIA_TYPE
+    else:
+        body, media_type = geojson_stream(items), GEOJSON_MEDIA_TYPE
+    headers = {"Content-Disposition": f'attachment; filename="trailback-{user_id}.{format}"'}
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
 @router.get("/{memory_id}/shares", response_model=List[MemoryShareOut])
-async def get_shares(memory_id: str, db: Client = Depends(get_db)) -> List[MemoryShareOut]:
-    return memory_service.get_shares(db, memory_id)
+async def get_shares(
+    memory_id: str,
+    paging: Optional[PageRequest] = Depends(page_params),
+    db: Client = Depends(get_db),
+) -> Response:
+    if paging:
+        try:
+            page = await memory_service.get_shares_page(db, memory_id, paging.limit, paging.cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return page_response(page, share_list_adapter)
+    return json_response(await memory_service.get_shares(db, memory_id), share_list_adapter)
 
 @router.post("/", response_model=MemoryOut, status_code=status.HTTP_201_CREATED)
 async def create_memory(payload: MemoryCreate, db: Client = Depends(get_db)) -> MemoryOut:
-    return memory_service.create_memory(db, payload)
+    return await memory_service.create_memory(db, payload)
+
+@router.post("/import", responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}})
+async def import_memories(
+    user_id: str,
+    file: UploadFile = File(...),
+    format: Optional[Literal["gpx", "geojson", "ndjson"]] = None,
+    db: Client = Depends(get_db),
+) -> StreamingResponse:
+    """Import waypoints from a GPX, GeoJSON or NDJSON file, streaming progress as NDJSON.
+
+    The spooled upload is parsed and inserted batch by batch while progress and per-row
+    error events are written to the response.
+    """
+    mime = IMPORT_MIME_TYPES.get(format or file_extension(file.filename))
+    if mime is None:
+        raise HTTPException(status_code=400, detail="Obsługiwane formaty: GPX, GeoJSON, NDJSON")
+    try:
+        fh = check_upload(file, mime, settings.max_import_bytes)
+    except FileTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    async def body() -> AsyncIterator[bytes]:
+        async for event in memory_service.import_memories(db, user_id, PARSERS[mime](fh)):
+            yield orjson.dumps(event) + b"\n"
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
 
 @router.post("/{memory_id}/upload-photo", status_code=status.HTTP_201_CREATED)
 async def upload_memory_photo(
@@ -36,11 +214,29 @@ async def upload_memory_photo(
     db: Client = Depends(get_db),
 ) -> dict:
     try:
-        url, _ = upload_photo_to_memory(db, memory_id, user_id, file)
+        url, _ = await upload_photo_to_memory(db, memory_id, user_id, file)
         return {"url": url}
+    except FileTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception:
         raise HTTPException(status_code=500, detail="Nie udało się dodać zdjęcia")
 
+@router.post("/{memory_id}/upload-photos", response_model=List[PhotoUploadResult])
+async def upload_memory_photos(
+    memory_id: str,
+    user_id: str,
+    files: List[UploadFile] = File(...),
+    db: Client = Depends(get_db),
+) -> List[PhotoUploadResult]:
+    if len(files) > settings.max_batch_files:
+        raise HTTPException(status_code=400, detail=f"Maksymalnie {settings.max_batch_files} zdjęć naraz")
+    try:
+        return await upload_photos_to_memory(db, memory_id, user_id, files)
+    except Exception:
+        raise HTTPException(status_code=500, detail="Nie udało się dodać zdjęć")
+
 @router.put("/{memory_id}/edit", response_model=MessageResponse)
 async def edit_memory(
     memory_id: str,
@@ -49,17 +245,25 @@ async def edit_memory(
     db: Client = Depends(get_db),
 ) -> MessageResponse:
     try:
-        memory_service.edit_memory(db, memory_id, payload, user_id)
+        await memory_service.edit_memory(db, memory_id, payload, user_id)
     except ValueError as exc:
         raise HTTPException(status_code=403, detail=str(exc)) from exc
     return MessageResponse(message="Wspomnienie zaktualizowane")
 
 @router.delete("/{memory_id}", response_model=MessageResponse)
-async def delete_memory(memory_id: str, user_id: str, db: Client = Depends(get_db)) -> MessageResponse:
+async def delete_memory(
+    memory_id: str,
+    user_id: str,
+    background_tasks: BackgroundTasks,
+    db: Client = Depends(get_db),
+) -> MessageResponse:
+    defer = settings.defer_storage_cleanup
     try:
-        memory_service.delete_memory(db, memory_id, user_id)
+        urls = await memory_service.delete_memory(db, memory_id, user_id, purge_storage=not defer)
     except ValueError as exc:
         raise HTTPException(status_code=403, detail=str(exc)) from exc
+    if defer and urls:
+        background_tasks.add_task(delete_files_in_background, db, memory_service.BUCKET_PHOTOS, urls)
     return MessageResponse(message="Wspomnienie usunięte")
 
 @router.post("/{memory_id}/share-user", response_model=MessageResponse)
@@ -70,12 +274,12 @@ async def share_memory_with_user(
     db: Client = Depends(get_db),
 ) -> MessageResponse:
     try:
-        memory_service.share_memory_with_user(db, memory_id, shared_with, shared_by)
+        await memory_service.share_memory_with_user(db, memory_id, shared_with, shared_by)
     except ValueError as exc:
         raise HTTPException(status_code=403, detail=str(exc)) from exc
     return MessageResponse(message="Użytkownik dodany do wspomnienia")
 
 @router.delete("/{memory_id}/share-user/{shared_with}", response_model=MessageResponse)
 async def unshare_memory(memory_id: str, shared_with: str, db: Client = Depends(get_db)) -> MessageResponse:
-    memory_service.unshare_memory(db, memory_id, shared_with)
+    await memory_service.unshare_memory(db, memory_id, shared_with)
     return MessageResponse(message="Udostępnienie usunięte")
@@ -1,22 +1,40 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 
-from fastapi import APIRouter, Depends, File, UploadFile, status, HTTPException
+from fastapi import APIRouter, Depends, File, Request, Response, UploadFile, status, HTTPException
+from pydantic import TypeAdapter
 from supabase import Client
 
+from backend.core.cache import photos_key
 from backend.db.supabase import get_db
 from backend.schemas.photo import PhotoCreate, PhotoOut
 from backend.schemas.response import MessageResponse
 from backend.services import photo_service
+from backend.utils.http import PageRequest, conditional_json, page_params, page_response
+from backend.utils.storage import FileTooLargeError
 
 router = APIRouter(prefix="/photos", tags=["Photos"])
 
+photo_list_adapter = TypeAdapter(List[PhotoOut])
+
 @router.get("/", response_model=List[PhotoOut])
-async def list_photos(memory_id: str, db: Client = Depends(get_db)) -> List[PhotoOut]:
-    return photo_service.list_photos(db, memory_id)
+async def list_photos(
+    request: Request,
+    memory_id: str,
+    paging: Optional[PageRequest] = Depends(page_params),
+    db: Client = Depends(get_db),
+) -> Response:
+    if paging:
+        try:
+            page = await photo_service.list_photos_page(db, memory_id, paging.limit, paging.cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return page_response(page, photo_list_adapter)
+    photos = await photo_service.list_photos(db, memory_id)
+    return conditional_json(request, photos, photo_list_adapter, photos_key(memory_id))
 
 @router.post("/", response_model=PhotoOut, status_code=status.HTTP_201_CREATED)
 async def add_photo(payload: PhotoCreate, db: Client = Depends(get_db)) -> PhotoOut:
-    return photo_service.create_photo(db, payload)
+    return await photo_service.create_photo(db, payload)
 
 @router.post("/{memory_id}/upload", status_code=status.HTTP_201_CREATED)
 async def upload_photo(
@@ -25,7 +43,12 @@ async def upload_photo(
     file: UploadFile = File(...),
     db: Client = Depends(get_db),
 ) -> dict:
-    url, record = photo_service.upload_photo(db, memory_id, user_id, file)
+    try:
+        url, record = await photo_service.upload_photo_to_memory(db, memory_id, user_id, file)
+    except FileTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     return {"url": url, "record": record}
 
 @router.delete("/{photo_id}", response_model=MessageResponse)
@@ -35,7 +58,7 @@ async def delete_photo(
     db: Client = Depends(get_db)
 ) -> MessageResponse:
     try:
-        photo_service.delete_photo(db, photo_id, user_id)
+        await photo_service.delete_photo(db, photo_id, user_id)
     except ValueError as exc:
         raise HTTPException(status_code=403, detail=str(exc)) from exc
     return MessageResponse(message="Zdjęcie usunięte")
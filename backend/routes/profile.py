@@ -1,16 +1,17 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from supabase import Client
 
 from backend.db.supabase import get_db
 from backend.schemas.user import ProfileOut, ProfileUpdate
 from backend.schemas.response import MessageResponse
 from backend.services import user_service
+from backend.utils.storage import FileTooLargeError
 
 router = APIRouter(tags=["Profile"])
 
 @router.get("/profile", response_model=ProfileOut)
 async def get_profile(user_id: str, db: Client = Depends(get_db)) -> ProfileOut:
-    return user_service.get_profile(db, user_id)
+    return await user_service.get_profile(db, user_id)
 
 @router.put("/profile", response_model=MessageResponse)
 async def update_profile(
@@ -18,7 +19,7 @@ async def update_profile(
     payload: ProfileUpdate,
     db: Client = Depends(get_db),
 ) -> MessageResponse:
-    user_service.update_profile(db, user_id, payload)
+    await user_service.update_profile(db, user_id, payload)
     return MessageResponse(message="Profil zaktualizowany")
 
 @router.post("/profile/avatar", response_model=ProfileOut)
@@ -27,4 +28,9 @@ async def upload_avatar(
     file: UploadFile = File(...),
     db: Client = Depends(get_db),
 ) -> ProfileOut:
-    return user_service.upload_avatar(db, user_id, file)
+    try:
+        return await user_service.upload_avatar(db, user_id, file)
+    except FileTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
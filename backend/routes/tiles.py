@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from supabase import Client
+
+from backend.db.supabase import get_db
+from backend.services import tile_service
+from backend.utils.http import etag_matches, make_etag
+from backend.utils.mvt import MAX_TILE_ZOOM
+
+router = APIRouter(prefix="/tiles", tags=["Tiles"])
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+@router.get("/{z}/{x}/{y}.mvt", responses={200: {"content": {MVT_MEDIA_TYPE: {}}}})
+async def get_tile(
+    request: Request,
+    z: int,
+    x: int,
+    y: int,
+    user_id: str,
+    db: Client = Depends(get_db),
+) -> Response:
+    if not 0 <= z <= MAX_TILE_ZOOM or not (0 <= x < 1 << z and 0 <= y < 1 << z):
+        raise HTTPException(status_code=404, detail="Nie ma takiego kafelka")
+    tile = await tile_service.get_tile(db, user_id, z, x, y)
+    etag = make_etag(tile)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=60"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers=headers)
@@ -1,17 +1,36 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import TypeAdapter
 from supabase import Client
 
+from backend.core.config import settings
 from backend.db.supabase import get_db
 from backend.schemas.user import UserOut
 from backend.services import user_service
+from backend.utils.http import json_response, page_response
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+user_list_adapter = TypeAdapter(List[UserOut])
+
 @router.get("", response_model=List[UserOut])
 async def list_users(
     search: Optional[str] = None,
     current_user: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size),
+    cursor: Optional[str] = None,
     db: Client = Depends(get_db),
-) -> List[UserOut]:
-    return user_service.list_users(db, search, current_user)
+) -> Response:
+    if search and search.strip():
+        if cursor:
+            raise HTTPException(status_code=400, detail="Wyniki wyszukiwania nie są stronicowane")
+        users = await user_service.list_users(db, search, current_user, min(limit or settings.user_search_limit, 100))
+        return json_response(users, user_list_adapter)
+    if limit or cursor:
+        try:
+            page = await user_service.list_users_page(db, current_user, limit or settings.page_size, cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return page_response(page, user_list_adapter)
+    users = await user_service.list_users(db, None, current_user)
+    return json_response(users, user_list_adapter)
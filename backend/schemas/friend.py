@@ -1,6 +1,14 @@
+from typing import List
 from pydantic import BaseModel
 
+from backend.schemas.user import ProfileOut
+
 class FriendOut(BaseModel):
     user_id: str
     friend_id: str
     status: str  # 'pending' | 'accepted'
+
+class FriendGraphOut(BaseModel):
+    friends: List[ProfileOut]
+    incoming: List[ProfileOut]
+    outgoing: List[ProfileOut]
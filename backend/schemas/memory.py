@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
 
 class MemoryCreate(BaseModel):
@@ -13,7 +13,7 @@ class MemoryCreate(BaseModel):
     @field_validator("title", mode="before")
     @classmethod
     def title_not_empty(cls, v: str) -> str:
-        if not v.strip():
+        if isinstance(v, str) and not v.strip():
             raise ValueError("Tytuł nie może być pusty")
         return v
 
@@ -26,6 +26,12 @@ class MemoryOut(BaseModel):
     created_by: str
     created_at: datetime
 
+class SharedMemoryOut(MemoryOut):
+    shared_by: Optional[str] = None
+
+class NearbyMemoryOut(SharedMemoryOut):
+    distance_m: float
+
 class MemoryShare(BaseModel):
     memory_id: str
     shared_with: str
@@ -35,3 +41,19 @@ class MemoryShare(BaseModel):
 class MemoryShareOut(BaseModel):
     shared_with: str
     shared_by: str
+
+class BoundingBox(BaseModel):
+    min_lat: float = Field(..., ge=-90, le=90)
+    min_lng: float = Field(..., ge=-180, le=180)
+    max_lat: float = Field(..., ge=-90, le=90)
+    max_lng: float = Field(..., ge=-180, le=180)
+
+class MemoryClusterOut(BaseModel):
+    lat: float
+    lng: float
+    count: int
+    sample_id: str
+
+class MemoryClustersOut(BaseModel):
+    clusters: List[MemoryClusterOut]
+    points: List[MemoryOut]
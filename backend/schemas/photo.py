@@ -13,3 +13,12 @@ class PhotoOut(BaseModel):
     url: str
     uploaded_by: str
     uploaded_at: datetime
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
+    webp_url: Optional[str] = None
+
+class PhotoUploadResult(BaseModel):
+    filename: Optional[str] = None
+    ok: bool
+    photo: Optional[PhotoOut] = None
+    error: Optional[str] = None
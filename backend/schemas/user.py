@@ -11,6 +11,9 @@ class ProfileOut(BaseModel):
     username: Optional[str] = None
     full_name: Optional[str] = None
     avatar_url: Optional[str] = None
+    avatar_thumbnail_url: Optional[str] = None
+    avatar_medium_url: Optional[str] = None
+    avatar_webp_url: Optional[str] = None
 
 class UserOut(BaseModel):
     id: str
@@ -1,34 +1,144 @@
-from typing import List
+import time
+from typing import Dict, List, Optional, Tuple
 from supabase import Client
 
-from backend.schemas.friend import FriendOut
+from backend.core.config import settings
+from backend.db.supabase import execute
+from backend.schemas.friend import FriendGraphOut, FriendOut
+from backend.schemas.user import ProfileOut
+from backend.utils.pagination import Page, decode_cursor, encode_cursor
 
 TABLE = "friendships"
+FRIENDSHIP_COLUMNS = ("user_id", "friend_id", "status")
 
-def list_friends(db: Client, user_id: str) -> List[FriendOut]:
+class _AdjacencyCache:
+    """Per-process cache of each user's friendship edges, updated in place by the mutations below.
+
+    Entries expire after ``settings.friend_cache_ttl`` seconds so that changes made by other
+    workers are picked up eventually.
+    """
+
+    def __init__(self) -> None:
+        self._edges: Dict[str, Tuple[float, Dict[str, dict]]] = {}
+
+    def get(self, user_id: str) -> Optional[Dict[str, dict]]:
+        entry = self._edges.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            self._edges.pop(user_id, None)
+            return None
+        return entry[1]
+
+    def put(self, user_id: str, rows: List[dict]) -> Dict[str, dict]:
+        edges = {_other(r, user_id): r for r in rows}
+        self._edges[user_id] = (time.monotonic() + settings.friend_cache_ttl, edges)
+        return edges
+
+    def set_edge(self, row: dict) -> None:
+        for user_id in (row["user_id"], row["friend_id"]):
+            edges = self.get(user_id)
+            if edges is not None:
+                edges[_other(row, user_id)] = row
+
+    def drop_edge(self, user_id: str, friend_id: str) -> None:
+        for a, b in ((user_id, friend_id), (friend_id, user_id)):
+            edges = self.get(a)
+            if edges is not None:
+                edges.pop(b, None)
+
+    def clear(self) -> None:
+        self._edges.clear()
+
+adjacency = _AdjacencyCache()
+
+def _other(row: dict, user_id: str) -> str:
+    return row["friend_id"] if row["user_id"] == user_id else row["user_id"]
+
+async def _edges(db: Client, user_id: str) -> Dict[str, dict]:
+    """Friendship rows of a user keyed by the other user's id, served from the adjacency cache."""
+    edges = adjacency.get(user_id)
+    if edges is None:
+        rows = (
+            await execute(
+                db.table(TABLE)
+                .select("*")
+                .or_(f"user_id.eq.{user_id},friend_id.eq.{user_id}")
+            )
+        ).data
+        edges = adjacency.put(user_id, rows)
+    return edges
+
+async def list_friends(db: Client, user_id: str) -> List[FriendOut]:
     """Return the list of friends and pending requests for a given user."""
+    return [FriendOut(**r) for r in (await _edges(db, user_id)).values()]
+
+async def list_friends_page(db: Client, user_id: str, limit: int, cursor: Optional[str]) -> Page[FriendOut]:
+    """List one page of friendships ordered by the other user's id, sliced from the adjacency cache."""
+    edges = await _edges(db, user_id)
+    others = sorted(edges)
+    if cursor:
+        after = decode_cursor(cursor, 1)[0]
+        others = [o for o in others if o > after]
+    chunk = others[:limit]
+    next_cursor = encode_cursor([chunk[-1]]) if len(others) > limit else None
+    return Page([FriendOut(**edges[o]) for o in chunk], next_cursor)
+
+async def are_friends(db: Client, user_id: str, other_id: str) -> bool:
+    """Check whether two users have an accepted friendship.
+
+    A positive answer comes from the adjacency cache; a negative one is confirmed against the
+    table, since another worker may have accepted the friendship after the cache was filled.
+    """
+    row = (await _edges(db, user_id)).get(other_id)
+    if row is not None and row["status"] == "accepted":
+        return True
     rows = (
-        db.table(TABLE)
-        .select("*")
-        .or_(f"user_id.eq.{user_id},friend_id.eq.{user_id}")
-        .execute()
-        .data
-    )
-    return [FriendOut(**r) for r in rows]
-
-def send_request(db: Client, user_id: str, friend_id: str) -> None:
+        await execute(
+            db.table(TABLE)
+            .select("*")
+            .or_(f"and(user_id.eq.{user_id},friend_id.eq.{other_id}),and(user_id.eq.{other_id},friend_id.eq.{user_id})")
+        )
+    ).data
+    for row in rows:
+        adjacency.set_edge(row)
+    return any(r["status"] == "accepted" for r in rows)
+
+async def get_friend_graph(db: Client, user_id: str) -> FriendGraphOut:
+    """Return accepted friends and pending requests of a user joined with their profiles.
+
+    The friend_graph function joins each friendship with the other user's profile in one
+    query, so the request does not grow with the number of friends; its edges refresh the
+    adjacency cache.
+    """
+    rows = (await execute(db.rpc("friend_graph", {"p_user_id": user_id}))).data
+    adjacency.put(user_id, [{k: r[k] for k in FRIENDSHIP_COLUMNS} for r in rows])
+
+    graph = FriendGraphOut(friends=[], incoming=[], outgoing=[])
+    for row in rows:
+        profile = ProfileOut(**{k: v for k, v in row.items() if k not in FRIENDSHIP_COLUMNS})
+        if row["status"] == "accepted":
+            graph.friends.append(profile)
+        elif row["user_id"] == user_id:
+            graph.outgoing.append(profile)
+        else:
+            graph.incoming.append(profile)
+    return graph
+
+async def send_request(db: Client, user_id: str, friend_id: str) -> None:
     """Send a pending friend request from user_id to friend_id."""
-    db.table(TABLE).insert(
-        {"user_id": user_id, "friend_id": friend_id, "status": "pending"}
-    ).execute()
+    row = {"user_id": user_id, "friend_id": friend_id, "status": "pending"}
+    inserted = (await execute(db.table(TABLE).insert(row))).data
+    adjacency.set_edge(inserted[0] if inserted else row)
 
-def accept_request(db: Client, user_id: str, friend_id: str) -> None:
+async def accept_request(db: Client, user_id: str, friend_id: str) -> None:
     """Accept a pending friend request."""
-    db.table(TABLE).update({"status": "accepted"}).match(
+    updated = (await execute(db.table(TABLE).update({"status": "accepted"}).match(
         {"user_id": friend_id, "friend_id": user_id, "status": "pending"}
-    ).execute()
+    ))).data
+    for row in updated or []:
+        adjacency.set_edge(row)
 
-def remove_friend(db: Client, user_id: str, friend_id: str) -> None:
+async def remove_friend(db: Client, user_id: str, friend_id: str) -> None:
     """Remove the friendship between two users."""
-    db.table(TABLE).delete().match({"user_id": user_id, "friend_id": friend_id}).execute()
-    db.table(TABLE).delete().match({"user_id": friend_id, "friend_id": user_id}).execute()
+    await execute(db.table(TABLE).delete().match({"user_id": user_id, "friend_id": friend_id}))
+    await execute(db.table(TABLE).delete().match({"user_id": friend_id, "friend_id": user_id}))
+    adjacency.drop_edge(user_id, friend_id)
@@ -1,112 +1,442 @@
 from datetime import datetime
-from typing import List, Dict, Any
+from itertools import islice
+from typing import List, Dict, Any, AsyncIterator, Iterable, Iterator, Optional, Tuple, Type
+
+import numpy as np
+from postgrest.types import ReturnMethod
+from pydantic import ValidationError
 from supabase import Client
 
-from backend.schemas.memory import MemoryCreate, MemoryOut, MemoryShareOut
-from backend.utils.geo import wkb_point_to_lat_lng
-from backend.utils.storage import delete_file
+from backend.core.cache import (
+    cache,
+    memories_key,
+    nearby_key,
+    owner_key,
+    photos_key,
+    shared_memories_key,
+    shares_key,
+    tile_key,
+    tiles_namespace,
+)
+from backend.core.config import settings
+from backend.db.supabase import execute, run_sync
+from backend.schemas.memory import (
+    BoundingBox,
+    MemoryClusterOut,
+    MemoryClustersOut,
+    MemoryCreate,
+    MemoryOut,
+    MemoryShareOut,
+    NearbyMemoryOut,
+    SharedMemoryOut,
+)
+from backend.schemas.photo import PhotoOut
+from backend.services import friend_service
+from backend.services.photo_service import photo_file_urls
+from backend.utils.cluster import grid_cluster
+from backend.utils.geo import wkb_point_to_lat_lng, wkb_points_to_lat_lng
+from backend.utils.importers import ImportRow
+from backend.utils.mvt import tiles_containing
+from backend.utils.pagination import Page, apply_keyset, split_page
+from backend.utils.points import MapPoints
+from backend.utils.spatial import PointIndex
+from backend.utils.storage import delete_files
 
 BUCKET_PHOTOS = "photos"
+MEMORY_KEYS = ("created_at", "id")
+SHARE_KEYS = ("shared_at", "memory_id")
+SHARED_MEMORY_COLUMNS = "shared_at, memory_id, shared_by, memories(*)"
 
-def list_memories(db: Client, user_id: str) -> List[MemoryOut]:
+async def list_memories(db: Client, user_id: str) -> List[MemoryOut]:
     """List all memories created by a given user."""
-    rows = db.table("memories").select("*").eq("created_by", user_id).execute().data
-    return _parse_memories(rows)
+    async def load() -> List[MemoryOut]:
+        rows = (await execute(db.table("memories").select("*").eq("created_by", user_id))).data
+        return _parse_memories(rows)
 
-def list_shared_memories(db: Client, user_id: str) -> List[MemoryOut]:
+    return await cache.get_or_load(memories_key(user_id), load)
+
+async def list_shared_memories(db: Client, user_id: str) -> List[SharedMemoryOut]:
     """List all memories shared with a given user."""
-    ids = [s["memory_id"] for s in db.table("memory_shares").select("memory_id").eq("shared_with", user_id).execute().data]
-    if not ids:
-        return []
-    rows = db.table("memories").select("*").in_("id", ids).execute().data
+    return await cache.get_or_load(shared_memories_key(user_id), lambda: _load_shared_memories(db, user_id))
+
+async def _load_shared_memories(db: Client, user_id: str) -> List[SharedMemoryOut]:
+    """Fetch the memories shared with a user, embedding the memory rows in one query."""
+    shares = (
+        await execute(
+            db.table("memory_shares")
+            .select(SHARED_MEMORY_COLUMNS)
+            .eq("shared_with", user_id)
+        )
+    ).data
+    return _parse_shared(shares)
+
+async def list_memories_page(db: Client, user_id: str, limit: int, cursor: Optional[str]) -> Page[MemoryOut]:
+    """List one page of a user's memories, newest first, keyed on (created_at, id)."""
+    query = apply_keyset(db.table("memories").select("*").eq("created_by", user_id), MEMORY_KEYS, limit, cursor)
+    rows, next_cursor = split_page((await execute(query)).data, limit, MEMORY_KEYS)
+    return Page(_parse_memories(rows), next_cursor)
+
+async def iter_memories_with_photos(db: Client, user_id: str) -> AsyncIterator[Tuple[MemoryOut, List[PhotoOut]]]:
+    """Yield every memory of a user with its photos, a keyset page at a time.
+
+    Each page is one memories query with the photos embedded, so memory use stays constant
+    however many memories the user has and the request URL does not grow with the page.
+    """
+    cursor: Optional[str] = None
+    while True:
+        query = apply_keyset(
+            db.table("memories").select("*, photos(*)").eq("created_by", user_id),
+            MEMORY_KEYS, settings.export_batch_size, cursor,
+        )
+        rows, cursor = split_page((await execute(query)).data, settings.export_batch_size, MEMORY_KEYS)
+        photos = {row["id"]: [PhotoOut(**p) for p in row.pop("photos") or []] for row in rows}
+        for memory in _parse_memories(rows):
+            yield memory, photos[memory.id]
+        if not cursor:
+            return
+
+async def list_shared_memories_page(
+    db: Client,
+    user_id: str,
+    limit: int,
+    cursor: Optional[str],
+) -> Page[SharedMemoryOut]:
+    """List one page of memories shared with a user, most recently shared first."""
+    query = apply_keyset(
+        db.table("memory_shares").select(SHARED_MEMORY_COLUMNS).eq("shared_with", user_id),
+        SHARE_KEYS, limit, cursor,
+    )
+    shares, next_cursor = split_page((await execute(query)).data, limit, SHARE_KEYS)
+    return Page(_parse_shared(shares), next_cursor)
+
+def _parse_shared(shares: List[dict]) -> List[SharedMemoryOut]:
+    """Flatten memory_shares rows with an embedded memory into SharedMemoryOut models."""
+    rows: Dict[str, dict] = {}
+    for share in shares:
+        memory = share.get("memories")
+        if memory and memory["id"] not in rows:
+            rows[memory["id"]] = {**memory, "shared_by": share["shared_by"]}
+    return _parse_memories(list(rows.values()), SharedMemoryOut)
+
+async def list_memories_in_bbox(
+    db: Client,
+    user_id: str,
+    bbox: BoundingBox,
+    limit: Optional[int] = None,
+    include_shared: bool = True,
+) -> List[MemoryOut]:
+    """List owned (and optionally shared) memories located inside a bounding box, newest first."""
+    rows = await fetch_bbox_rows(db, user_id, bbox, limit, include_shared)
     return _parse_memories(rows)
 
-def create_memory(db: Client, data: MemoryCreate) -> MemoryOut:
+async def cluster_memories(
+    db: Client,
+    user_id: str,
+    bbox: BoundingBox,
+    zoom: int,
+    min_cluster_size: int = 2,
+    include_shared: bool = True,
+) -> MemoryClustersOut:
+    """Aggregate visible memories into grid clusters for a zoom level.
+
+    Cells holding fewer than ``min_cluster_size`` memories are returned as individual points.
+    """
+    rows = await fetch_bbox_rows(db, user_id, bbox, None, include_shared)
+    lat, lng, valid = wkb_points_to_lat_lng([row.get("location") for row in rows])
+    idx = np.flatnonzero(valid)
+    if not idx.size:
+        return MemoryClustersOut(clusters=[], points=[])
+
+    grid = grid_cluster(lat[idx], lng[idx], zoom)
+    is_cluster = grid.count >= min_cluster_size
+    clusters = [
+        MemoryClusterOut(
+            lat=grid.lat[c],
+            lng=grid.lng[c],
+            count=int(grid.count[c]),
+            sample_id=rows[idx[grid.first[c]]]["id"],
+        )
+        for c in np.flatnonzero(is_cluster).tolist()
+    ]
+    lats, lngs = lat.tolist(), lng.tolist()
+    points = [
+        MemoryOut(**rows[i], lat=lats[i], lng=lngs[i])
+        for i in idx[~is_cluster[grid.labels]].tolist()
+    ]
+    return MemoryClustersOut(clusters=clusters, points=points)
+
+async def map_points(
+    db: Client,
+    user_id: str,
+    bbox: BoundingBox,
+    include_shared: bool = True,
+) -> MapPoints:
+    """Return id, title and coordinates of visible memories as parallel arrays for map rendering."""
+    rows = await fetch_bbox_rows(db, user_id, bbox, None, include_shared)
+    lat, lng, valid = wkb_points_to_lat_lng([row.get("location") for row in rows])
+    idx = np.flatnonzero(valid).tolist()
+    return MapPoints(
+        ids=[rows[i]["id"] for i in idx],
+        titles=[rows[i]["title"] for i in idx],
+        lat=lat[valid],
+        lng=lng[valid],
+    )
+
+async def list_nearby_memories(
+    db: Client,
+    user_id: str,
+    lat: float,
+    lng: float,
+    radius_m: float,
+    limit: int,
+) -> List[NearbyMemoryOut]:
+    """List owned and shared memories within ``radius_m`` metres of a point, nearest first.
+
+    Served from a per-user STRtree built lazily from the cached memory lists and dropped
+    whenever one of those lists is invalidated.
+    """
+    async def load() -> PointIndex:
+        own = await list_memories(db, user_id)
+        shared = await list_shared_memories(db, user_id)
+        own_ids = {m.id for m in own}
+        items = [*own, *(m for m in shared if m.id not in own_ids)]
+        return await run_sync(PointIndex, items)
+
+    index = await cache.get_or_load(nearby_key(user_id), load)
+    return [
+        NearbyMemoryOut(**memory.model_dump(), distance_m=distance)
+        for memory, distance in index.within(lat, lng, radius_m, limit)
+    ]
+
+async def create_memory(db: Client, data: MemoryCreate) -> MemoryOut:
     """Create a new memory record."""
-    location_point = f"POINT({data.lng} {data.lat})"
-    row = db.table("memories").insert({
-        "title": data.title.strip(),
-        "description": data.description.strip() if data.description else None,
-        "location": location_point,
-        "created_by": data.created_by,
-        "created_at": data.created_at.isoformat(),
-    }).execute().data[0]
+    row = (await execute(db.table("memories").insert(_memory_row(data)))).data[0]
+    cache.invalidate(memories_key(data.created_by), nearby_key(data.created_by))
+    _invalidate_tiles([data.created_by], data.lat, data.lng)
     return MemoryOut(**row, lat=data.lat, lng=data.lng)
 
-def edit_memory(db: Client, memory_id: str, payload: Dict[str, Any], user_id: str) -> None:
-    """Edit an existing memory if the user is the owner."""
-    memory = (
-        db.table("memories")
-        .select("created_by")
-        .eq("id", memory_id)
-        .single()
-        .execute()
-        .data
-    )
-    if not memory:
-        raise ValueError("Wspomnienie nie istnieje")
-    if memory["created_by"] != user_id:
+async def import_memories(db: Client, user_id: str, rows: Iterator[ImportRow]) -> AsyncIterator[Dict[str, Any]]:
+    """Validate parsed rows and insert them in batches, yielding progress and per-row errors.
+
+    Rows are pulled from the parser ``settings.import_batch_size`` at a time in a worker
+    thread, so a large file is never fully materialised and parsing does not block the loop.
+    Rows parsed before a file-level parse error are still inserted.
+    """
+    processed = imported = failed = 0
+    created_at = datetime.utcnow()
+    while True:
+        chunk, parse_error = await run_sync(_take_rows, rows, settings.import_batch_size)
+        batch: List[MemoryCreate] = []
+        batch_rows: List[int] = []
+        for item in chunk:
+            processed += 1
+            if item.fields is None:
+                failed += 1
+                yield {"type": "error", "row": item.row, "error": item.error}
+                continue
+            try:
+                batch.append(MemoryCreate(**{"created_at": created_at, **item.fields, "created_by": user_id}))
+                batch_rows.append(item.row)
+            except ValidationError as exc:
+                failed += 1
+                yield {"type": "error", "row": item.row, "error": _validation_message(exc)}
+        if batch:
+            try:
+                await execute(
+                    db.table("memories").insert([_memory_row(m) for m in batch], returning=ReturnMethod.minimal)
+                )
+            except Exception:
+                failed += len(batch)
+                yield {"type": "error", "rows": batch_rows, "error": "Nie udało się zapisać partii wspomnień"}
+            else:
+                imported += len(batch)
+                cache.invalidate(memories_key(user_id), nearby_key(user_id))
+                cache.bump(tiles_namespace(user_id))
+        if chunk:
+            yield {"type": "progress", "processed": processed, "imported": imported, "failed": failed}
+        if parse_error:
+            yield {"type": "error", "error": parse_error}
+            break
+        if not chunk:
+            break
+    yield {"type": "done", "processed": processed, "imported": imported, "failed": failed}
+
+def _take_rows(rows: Iterator[ImportRow], size: int) -> Tuple[List[ImportRow], Optional[str]]:
+    """Pull up to ``size`` rows, stopping early at a parse error and returning it with the rows read so far."""
+    chunk: List[ImportRow] = []
+    try:
+        for item in islice(rows, size):
+            chunk.append(item)
+    except ValueError as exc:
+        return chunk, str(exc)
+    return chunk, None
+
+async def edit_memory(db: Client, memory_id: str, payload: Dict[str, Any], user_id: str) -> None:
+    """Edit an existing memory if the user is the owner.
+
+    The update itself is filtered on the owner; only when it matches nothing is the memory
+    looked up, to tell a missing memory from a foreign one.
+    """
+    previous = await _memory_owner(db, memory_id) if "location" in payload else None
+    updated = (
+        await execute(db.table("memories").update(payload).eq("id", memory_id).eq("created_by", user_id))
+    ).data
+    if not updated:
+        exists = (await execute(db.table("memories").select("id").eq("id", memory_id))).data
+        if not exists:
+            raise ValueError("Wspomnienie nie istnieje")
         raise ValueError("Tylko właściciel może edytować wspomnienie")
-    db.table("memories").update(payload).eq("id", memory_id).execute()
+    cache.invalidate(owner_key(memory_id))
+    shares = await get_shares(db, memory_id)
+    _invalidate_memory(user_id, shares, updated[0].get("location"))
+    if previous and previous["location"] != updated[0].get("location"):
+        _invalidate_location_tiles([user_id, *(s.shared_with for s in shares)], previous["location"])
 
-def share_memory_with_user(db: Client, memory_id: str, shared_with: str, shared_by: str) -> None:
+async def share_memory_with_user(db: Client, memory_id: str, shared_with: str, shared_by: str) -> None:
     """Share a memory with another user (only owner can share)."""
-    ownership = (
-        db.table("memories")
-        .select("id")
-        .eq("id", memory_id)
-        .eq("created_by", shared_by)
-        .execute()
-        .data
-    )
-    if not ownership:
+    memory = await _memory_owner(db, memory_id)
+    if not memory or memory["created_by"] != shared_by:
         raise ValueError("Tylko właściciel może udostępniać wspomnienie")
-    db.table("memory_shares").insert({
+    if not await friend_service.are_friends(db, shared_by, shared_with):
+        raise ValueError("Wspomnienia można udostępniać tylko znajomym")
+    await execute(db.table("memory_shares").insert({
         "memory_id": memory_id,
         "shared_with": shared_with,
         "shared_by": shared_by,
         "shared_at": datetime.utcnow().isoformat(),
-    }).execute()
+    }))
+    cache.invalidate(shares_key(memory_id), shared_memories_key(shared_with), nearby_key(shared_with))
+    _invalidate_location_tiles([shared_with], memory["location"])
 
-def unshare_memory(db: Client, memory_id: str, shared_with: str) -> None:
+async def unshare_memory(db: Client, memory_id: str, shared_with: str) -> None:
     """Remove memory sharing from a user."""
-    db.table("memory_shares").delete().eq("memory_id", memory_id).eq("shared_with", shared_with).execute()
+    await execute(db.table("memory_shares").delete().eq("memory_id", memory_id).eq("shared_with", shared_with))
+    cache.invalidate(shares_key(memory_id), shared_memories_key(shared_with), nearby_key(shared_with))
+    memory = await _memory_owner(db, memory_id)
+    if memory:
+        _invalidate_location_tiles([shared_with], memory["location"])
+
+async def _memory_owner(db: Client, memory_id: str) -> Optional[Dict[str, Any]]:
+    """Owner and location of a memory, memoized until the memory is edited or deleted."""
+    async def load() -> Optional[Dict[str, Any]]:
+        rows = (await execute(db.table("memories").select("created_by, location").eq("id", memory_id))).data
+        return rows[0] if rows else None
 
-def get_shares(db: Client, memory_id: str) -> List[MemoryShareOut]:
+    return await cache.get_or_load(owner_key(memory_id), load)
+
+async def get_shares(db: Client, memory_id: str) -> List[MemoryShareOut]:
     """List all users with whom the memory is shared."""
-    rows = db.table("memory_shares").select("shared_with, shared_by").eq("memory_id", memory_id).execute().data
-    return [MemoryShareOut(**r) for r in rows]
-
-def delete_memory(db: Client, memory_id: str, user_id: str) -> None:
-    """Delete a memory with all related photos and shares if the user is the owner."""
-    memory = (
-        db.table("memories")
-        .select("created_by")
-        .eq("id", memory_id)
-        .single()
-        .execute()
-        .data
+    async def load() -> List[MemoryShareOut]:
+        rows = (
+            await execute(db.table("memory_shares").select("shared_with, shared_by").eq("memory_id", memory_id))
+        ).data
+        return [MemoryShareOut(**r) for r in rows]
+
+    return await cache.get_or_load(shares_key(memory_id), load)
+
+async def get_shares_page(db: Client, memory_id: str, limit: int, cursor: Optional[str]) -> Page[MemoryShareOut]:
+    """List one page of a memory's shares, most recent first."""
+    keys = ("shared_at", "shared_with")
+    query = apply_keyset(
+        db.table("memory_shares").select("shared_with, shared_by, shared_at").eq("memory_id", memory_id),
+        keys, limit, cursor,
     )
-    if not memory:
+    rows, next_cursor = split_page((await execute(query)).data, limit, keys)
+    return Page([MemoryShareOut(**r) for r in rows], next_cursor)
+
+async def delete_memory(db: Client, memory_id: str, user_id: str, purge_storage: bool = True) -> List[str]:
+    """Delete a memory with all related photos and shares if the user is the owner.
+
+    Returns the storage URLs of the deleted photos and their derivatives. With
+    ``purge_storage=False`` their objects are left for the caller to remove, e.g. in a
+    background task.
+    """
+    rows = (
+        await execute(
+            db.table("memories")
+            .select("created_by, location, photos(*), memory_shares(shared_with, shared_by)")
+            .eq("id", memory_id)
+        )
+    ).data
+    if not rows:
         raise ValueError("Wspomnienie nie istnieje.")
+    memory = rows[0]
     if memory["created_by"] != user_id:
         raise ValueError("Tylko właściciel może usunąć wspomnienie.")
+    shares = [MemoryShareOut(**s) for s in memory["memory_shares"]]
+    photos = memory["photos"]
+
+    urls = [url for photo in photos for url in photo_file_urls(photo)]
+    if purge_storage:
+        await delete_files(db, BUCKET_PHOTOS, urls)
+
+    if photos:
+        await execute(db.table("photos").delete().eq("memory_id", memory_id))
+    await execute(db.table("memory_shares").delete().eq("memory_id", memory_id))
+    await execute(db.table("memories").delete().eq("id", memory_id))
+    _invalidate_memory(user_id, shares, memory["location"])
+    cache.invalidate(photos_key(memory_id), shares_key(memory_id), owner_key(memory_id))
+    return urls
+
+def _memory_row(data: MemoryCreate) -> Dict[str, Any]:
+    return {
+        "title": data.title.strip(),
+        "description": data.description.strip() if data.description else None,
+        "location": f"POINT({data.lng} {data.lat})",
+        "created_by": data.created_by,
+        "created_at": data.created_at.isoformat(),
+    }
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+
+def _invalidate_memory(owner_id: str, shares: List[MemoryShareOut], location: Optional[str]) -> None:
+    """Drop cached memory lists and map tiles of the owner and of every user the memory is shared with."""
+    cache.invalidate(
+        memories_key(owner_id),
+        nearby_key(owner_id),
+        *(shared_memories_key(s.shared_with) for s in shares),
+        *(nearby_key(s.shared_with) for s in shares),
+    )
+    _invalidate_location_tiles([owner_id, *(s.shared_with for s in shares)], location)
+
+def _invalidate_location_tiles(user_ids: Iterable[str], location: Optional[str]) -> None:
+    coords = wkb_point_to_lat_lng(location) if location else None
+    if coords:
+        _invalidate_tiles(user_ids, *coords)
+
+def _invalidate_tiles(user_ids: Iterable[str], lat: float, lng: float) -> None:
+    """Drop the cached tiles of the given users whose buffered area covers the point, at every zoom."""
+    tiles = list(tiles_containing(lat, lng))
+    cache.invalidate(*(tile_key(u, z, x, y) for u in set(user_ids) for z, x, y in tiles))
+
+async def fetch_bbox_rows(
+    db: Client,
+    user_id: str,
+    bbox: BoundingBox,
+    limit: Optional[int],
+    include_shared: bool,
+) -> List[dict]:
+    """Fetch raw memory rows inside a bounding box through the memories_in_bbox function."""
+    return (
+        await execute(
+            db.rpc("memories_in_bbox", {
+                "p_user_id": user_id,
+                "p_min_lng": bbox.min_lng,
+                "p_min_lat": bbox.min_lat,
+                "p_max_lng": bbox.max_lng,
+                "p_max_lat": bbox.max_lat,
+                "p_include_shared": include_shared,
+                "p_limit": limit,
+            })
+        )
+    ).data or []
 
-    photos = db.table("photos").select("id", "url").eq("memory_id", memory_id).execute().data
-    for photo in photos:
-        delete_file(db, BUCKET_PHOTOS, photo["url"])
-        db.table("photos").delete().eq("id", photo["id"]).execute()
-
-    db.table("memory_shares").delete().eq("memory_id", memory_id).execute()
-    db.table("memories").delete().eq("id", memory_id).execute()
-
-def _parse_memories(rows: List[dict]) -> List[MemoryOut]:
-    """Helper to parse memory rows into MemoryOut models."""
-    out: List[MemoryOut] = []
-    for row in rows:
-        coords = wkb_point_to_lat_lng(row.get("location"))
-        if not coords:
-            continue
-        lat, lng = coords
-        out.append(MemoryOut(**row, lat=lat, lng=lng))
-    return out
+def _parse_memories(rows: List[dict], model: Type[MemoryOut] = MemoryOut) -> List[MemoryOut]:
+    """Helper to parse memory rows into MemoryOut models, dropping rows without a valid location."""
+    lat, lng, valid = wkb_points_to_lat_lng([row.get("location") for row in rows])
+    lats, lngs = lat.tolist(), lng.tolist()
+    return [
+        model(**rows[i], lat=lats[i], lng=lngs[i])
+        for i in np.flatnonzero(valid).tolist()
+    ]
@@ -1,51 +1,146 @@
-from typing import List, Tuple
+import asyncio
+from typing import BinaryIO, Dict, List, Optional, Tuple
 from fastapi import UploadFile
 from supabase import Client
 
-from backend.schemas.photo import PhotoCreate, PhotoOut
-from backend.utils.storage import upload_file, delete_file
+from backend.core.cache import cache, photos_key
+from backend.core.config import settings
+from backend.db.supabase import execute
+from backend.schemas.photo import PhotoCreate, PhotoOut, PhotoUploadResult
+from backend.utils.images import DERIVABLE_MIME_TYPES, derivative_key, schedule_derivatives
+from backend.utils.pagination import Page, apply_keyset, split_page
+from backend.utils.storage import IMAGE_MIME_TYPES, delete_files, check_upload, storage_key, upload_file, validate_image
 
 BUCKET = "photos"
+PHOTO_KEYS = ("uploaded_at", "id")
+DERIVATIVE_COLUMNS = {"thumb.jpg": "thumbnail_url", "medium.jpg": "medium_url", "medium.webp": "webp_url"}
 
-def list_photos(db: Client, memory_id: str) -> List[PhotoOut]:
+async def list_photos(db: Client, memory_id: str) -> List[PhotoOut]:
     """Return all photos related to a given memory."""
-    rows = db.table("photos").select("*").eq("memory_id", memory_id).execute().data
-    return [PhotoOut(**r) for r in rows]
+    async def load() -> List[PhotoOut]:
+        rows = (await execute(db.table("photos").select("*").eq("memory_id", memory_id))).data
+        return [PhotoOut(**r) for r in rows]
 
-def create_photo(db: Client, data: PhotoCreate) -> PhotoOut:
+    return await cache.get_or_load(photos_key(memory_id), load)
+
+async def list_photos_page(db: Client, memory_id: str, limit: int, cursor: Optional[str]) -> Page[PhotoOut]:
+    """List one page of a memory's photos, newest first, keyed on (uploaded_at, id)."""
+    query = apply_keyset(db.table("photos").select("*").eq("memory_id", memory_id), PHOTO_KEYS, limit, cursor)
+    rows, next_cursor = split_page((await execute(query)).data, limit, PHOTO_KEYS)
+    return Page([PhotoOut(**r) for r in rows], next_cursor)
+
+async def create_photo(db: Client, data: PhotoCreate) -> PhotoOut:
     """Insert a photo record into the database."""
-    row = db.table("photos").insert(data.model_dump()).execute().data[0]
+    row = (await execute(db.table("photos").insert(data.model_dump()))).data[0]
+    cache.invalidate(photos_key(data.memory_id))
     return PhotoOut(**row)
 
-def upload_photo_to_memory(db: Client, memory_id: str, user_id: str, file: UploadFile) -> Tuple[str, PhotoOut]:
-    """Upload a photo file to storage and create a related photo record."""
-    url = upload_file(db, BUCKET, memory_id, file.filename, file.file.read(), file.content_type)
-    record = create_photo(db, PhotoCreate(memory_id=memory_id, url=url, uploaded_by=user_id))
+async def upload_photo_to_memory(db: Client, memory_id: str, user_id: str, file: UploadFile) -> Tuple[str, PhotoOut]:
+    """Stream a photo file to storage, create a related photo record and queue its derivatives."""
+    mime = validate_image(file.filename, file.content_type, IMAGE_MIME_TYPES)
+    fh = check_upload(file, mime, settings.max_upload_bytes)
+    url = await upload_file(db, BUCKET, memory_id, file.filename, fh, mime)
+    record = await create_photo(db, PhotoCreate(memory_id=memory_id, url=url, uploaded_by=user_id))
+    if mime in DERIVABLE_MIME_TYPES:
+        await schedule_derivatives(db, BUCKET, url, fh, lambda urls: _store_derivatives(db, record, urls))
     return url, record
 
-def delete_photo(db: Client, photo_id: str, user_id: str) -> None:
-    """Delete a photo if the user has permission."""
-    photo = db.table("photos").select("url, memory_id, uploaded_by").eq("id", photo_id).single().execute().data
-    if not photo:
-        raise ValueError("Zdjęcie nie istnieje")
+async def upload_photos_to_memory(
+    db: Client,
+    memory_id: str,
+    user_id: str,
+    files: List[UploadFile],
+) -> List[PhotoUploadResult]:
+    """Upload many photos concurrently and insert all their records with one bulk insert.
 
-    memory_id = photo["memory_id"]
-    uploaded_by = photo["uploaded_by"]
+    At most ``settings.upload_concurrency`` files are streamed to storage at a time. Files
+    that fail validation or upload are reported individually and do not stop the others.
+    """
+    semaphore = asyncio.Semaphore(settings.upload_concurrency)
+
+    async def store(file: UploadFile) -> Tuple[str, BinaryIO, str]:
+        mime = validate_image(file.filename, file.content_type, IMAGE_MIME_TYPES)
+        fh = check_upload(file, mime, settings.max_upload_bytes)
+        async with semaphore:
+            url = await upload_file(db, BUCKET, memory_id, file.filename, fh, mime)
+        return url, fh, mime
+
+    outcomes = await asyncio.gather(*(store(f) for f in files), return_exceptions=True)
+    uploaded = [o for o in outcomes if not isinstance(o, BaseException)]
+
+    records: Dict[str, PhotoOut] = {}
+    if uploaded:
+        rows = [{"memory_id": memory_id, "url": url, "uploaded_by": user_id} for url, _, _ in uploaded]
+        try:
+            inserted = (await execute(db.table("photos").insert(rows))).data
+        except Exception:
+            await delete_files(db, BUCKET, [url for url, _, _ in uploaded])
+            raise
+        records = {row["url"]: PhotoOut(**row) for row in inserted}
+        cache.invalidate(photos_key(memory_id))
 
-    memory = db.table("memories").select("created_by").eq("id", memory_id).single().execute().data
-    if not memory:
-        raise ValueError("Wspomnienie nie istnieje")
+    await asyncio.gather(*(
+        schedule_derivatives(db, BUCKET, url, fh, lambda urls, record=records[url]: _store_derivatives(db, record, urls))
+        for url, fh, mime in uploaded
+        if mime in DERIVABLE_MIME_TYPES
+    ))
 
-    memory_owner = memory["created_by"]
+    results: List[PhotoUploadResult] = []
+    for file, outcome in zip(files, outcomes):
+        if isinstance(outcome, BaseException):
+            error = str(outcome) if isinstance(outcome, ValueError) else "Nie udało się dodać zdjęcia"
+            results.append(PhotoUploadResult(filename=file.filename, ok=False, error=error))
+        else:
+            results.append(PhotoUploadResult(filename=file.filename, ok=True, photo=records[outcome[0]]))
+    return results
 
-    shares = db.table("memory_shares").select("*").eq("memory_id", memory_id).eq("shared_with", user_id).execute().data
+def _store_derivatives(db: Client, photo: PhotoOut, urls: Dict[str, str]) -> None:
+    """Record derivative URLs on a photo row; runs in the image worker pool.
+
+    If the photo was deleted while they rendered, the derivatives are removed again.
+    """
+    data = {DERIVATIVE_COLUMNS[suffix]: url for suffix, url in urls.items()}
+    if not db.table("photos").update(data).eq("id", photo.id).execute().data:
+        db.storage.from_(BUCKET).remove([storage_key(url) for url in urls.values()])
+        return
+    cache.invalidate(photos_key(photo.memory_id))
+
+def photo_file_urls(photo: dict) -> List[str]:
+    """All storage URLs belonging to a photo row: the original and every possible derivative.
+
+    Derivative URLs are computed from the original, so ones still being generated and not
+    yet recorded on the row are removed too.
+    """
+    url = photo["url"]
+    return [url, *(derivative_key(url.split("?", 1)[0], suffix) for suffix in DERIVATIVE_COLUMNS)]
+
+async def delete_photo(db: Client, photo_id: str, user_id: str) -> None:
+    """Delete a photo if the user uploaded it or owns its memory.
+
+    The photo and its memory's owner come back in one embedded select; memory shares are
+    read only to word the refusal.
+    """
+    rows = (await execute(db.table("photos").select("*, memories(created_by)").eq("id", photo_id))).data
+    if not rows:
+        raise ValueError("Zdjęcie nie istnieje")
+    photo = rows[0]
+    memory_id = photo["memory_id"]
+    memory_owner = (photo.pop("memories") or {}).get("created_by")
 
-    if user_id == memory_owner or user_id == uploaded_by:
-        pass
-    elif shares:
-        raise ValueError("Nie możesz usuwać cudzych zdjęć z udostępnionego wspomnienia.")
-    else:
+    if user_id not in (memory_owner, photo["uploaded_by"]):
+        shared = (
+            await execute(
+                db.table("memory_shares")
+                .select("memory_id")
+                .eq("memory_id", memory_id)
+                .eq("shared_with", user_id)
+                .limit(1)
+            )
+        ).data
+        if shared:
+            raise ValueError("Nie możesz usuwać cudzych zdjęć z udostępnionego wspomnienia.")
         raise ValueError("Brak uprawnień.")
 
-    delete_file(db, BUCKET, photo["url"])
-    db.table("photos").delete().eq("id", photo_id).execute()
+    await delete_files(db, BUCKET, photo_file_urls(photo))
+    await execute(db.table("photos").delete().eq("id", photo_id))
+    cache.invalidate(photos_key(memory_id))
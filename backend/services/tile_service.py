@@ -0,0 +1,68 @@
+from typing import Any, Dict, List
+
+import numpy as np
+from supabase import Client
+
+from backend.core.cache import cache, tile_key
+from backend.schemas.memory import BoundingBox
+from backend.services.memory_service import fetch_bbox_rows
+from backend.utils.cluster import grid_cluster
+from backend.utils.geo import wkb_points_to_lat_lng
+from backend.utils.mvt import TILE_EXTENT, encode_point_layer, tile_bounds, to_tile_coords
+
+OWNED_LAYER = "owned"
+SHARED_LAYER = "shared"
+TILE_TTL_SECONDS = 600
+# Up to this zoom, memories are merged into grid clusters so a tile holds at most one
+# feature per cell (16 per tile at the default cell size) whatever the user's memory count.
+MAX_CLUSTER_ZOOM = 14
+
+async def get_tile(db: Client, user_id: str, z: int, x: int, y: int) -> bytes:
+    """Return the Mapbox Vector Tile with a user's owned and shared memory layers, cached per tile."""
+    async def load() -> bytes:
+        min_lat, min_lng, max_lat, max_lng = tile_bounds(z, x, y)
+        bbox = BoundingBox(min_lat=min_lat, min_lng=min_lng, max_lat=max_lat, max_lng=max_lng)
+        rows = await fetch_bbox_rows(db, user_id, bbox, None, True)
+        lat, lng, valid = wkb_points_to_lat_lng([row.get("location") for row in rows])
+
+        owned = np.array([row["created_by"] == user_id for row in rows], dtype=bool)
+        layers = []
+        for name, mask in ((OWNED_LAYER, valid & owned), (SHARED_LAYER, valid & ~owned)):
+            idx = np.flatnonzero(mask)
+            if idx.size:
+                layers.append(_encode_layer(name, rows, idx, lat[idx], lng[idx], z, x, y))
+        return b"".join(layer for layer in layers if layer)
+
+    return await cache.get_or_load(tile_key(user_id, z, x, y), load, ttl=TILE_TTL_SECONDS)
+
+def _encode_layer(
+    name: str,
+    rows: List[dict],
+    idx: np.ndarray,
+    lat: np.ndarray,
+    lng: np.ndarray,
+    z: int,
+    x: int,
+    y: int,
+) -> bytes:
+    """Encode one layer, as single points above MAX_CLUSTER_ZOOM and as grid clusters up to it.
+
+    Cluster cells are aligned with tiles, so cells of the buffer area belong to neighbouring
+    tiles and are left to them; single-member cells keep the memory's id and title.
+    """
+    if z > MAX_CLUSTER_ZOOM:
+        px, py = to_tile_coords(lat, lng, z, x, y)
+        props = [{"id": rows[i]["id"], "title": rows[i].get("title")} for i in idx.tolist()]
+        return encode_point_layer(name, px.tolist(), py.tolist(), props)
+
+    grid = grid_cluster(lat, lng, z)
+    px, py = to_tile_coords(grid.lat, grid.lng, z, x, y)
+    inside = np.flatnonzero((px >= 0) & (px < TILE_EXTENT) & (py >= 0) & (py < TILE_EXTENT)).tolist()
+    if not inside:
+        return b""
+    props: List[Dict[str, Any]] = []
+    for c in inside:
+        row = rows[idx[grid.first[c]]]
+        count = int(grid.count[c])
+        props.append({"id": row["id"], "title": row.get("title")} if count == 1 else {"count": count, "sample_id": row["id"]})
+    return encode_point_layer(name, px[inside].tolist(), py[inside].tolist(), props)
@@ -1,59 +1,107 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from fastapi import UploadFile
 from supabase import Client
 
+from backend.core.config import settings
+from backend.core.cache import cache, profile_key
+from backend.db.supabase import execute
 from backend.schemas.user import ProfileOut, ProfileUpdate, UserOut
+from backend.utils.images import schedule_derivatives
+from backend.utils.pagination import Page, apply_keyset, split_page
+from backend.utils.storage import check_upload, file_extension, upload_stream, validate_image
 
 PROFILE_TABLE = "profiles"
 USER_VIEW = "user_profiles_view"
+AVATAR_BUCKET = "avatars"
+AVATAR_EXTENSIONS = ("jpg", "jpeg", "png")
+AVATAR_DERIVATIVE_COLUMNS = {
+    "thumb.jpg": "avatar_thumbnail_url",
+    "medium.jpg": "avatar_medium_url",
+    "medium.webp": "avatar_webp_url",
+}
+PROFILE_COLUMNS = "id, username, full_name, avatar_url, " + ", ".join(AVATAR_DERIVATIVE_COLUMNS.values())
 
-def list_users(db: Client, search: Optional[str], current_user: Optional[str]) -> List[UserOut]:
-    """List users optionally filtered by search query, excluding the current user."""
-    query = db.table(USER_VIEW).select("id, email, username, full_name, avatar_url")
-    if search:
-        query = query.filter("username", "ilike", f"%{search}%")
-    rows = query.execute().data or []
-    if current_user:
-        rows = [r for r in rows if r["id"] != current_user]
+async def list_users(
+    db: Client,
+    search: Optional[str],
+    current_user: Optional[str],
+    limit: Optional[int] = None,
+) -> List[UserOut]:
+    """List users ranked by how well their username matches ``search``, excluding the current user.
+
+    Matching, ranking, self-exclusion and the limit are applied by the indexed
+    search_users function. Searches default to ``settings.user_search_limit`` results.
+    """
+    search = (search or "").strip() or None
+    if search and limit is None:
+        limit = settings.user_search_limit
+    rows = (
+        await execute(
+            db.rpc("search_users", {"p_query": search, "p_exclude": current_user, "p_limit": limit})
+        )
+    ).data or []
     return [UserOut(**r) for r in rows]
 
-def get_profile(db: Client, user_id: str) -> ProfileOut:
-    """Retrieve the profile information for a user."""
-    resp = (
-        db.table(PROFILE_TABLE)
-        .select("id, username, full_name, avatar_url")
-        .eq("id", user_id)
-        .single()
-        .execute()
+async def list_users_page(
+    db: Client,
+    current_user: Optional[str],
+    limit: int,
+    cursor: Optional[str],
+) -> Page[UserOut]:
+    """List one page of all users except the current one, keyed on id."""
+    keys = ("id",)
+    query = apply_keyset(
+        db.rpc("search_users", {"p_query": None, "p_exclude": current_user, "p_limit": None}),
+        keys, limit, cursor, descending=False,
     )
-    if not resp.data:
-        raise ValueError("Profile not found")
-    return ProfileOut(**resp.data)
+    rows, next_cursor = split_page((await execute(query)).data or [], limit, keys)
+    return Page([UserOut(**r) for r in rows], next_cursor)
+
+async def get_profile(db: Client, user_id: str) -> ProfileOut:
+    """Retrieve the profile information for a user."""
+    async def load() -> ProfileOut:
+        resp = await execute(
+            db.table(PROFILE_TABLE)
+            .select(PROFILE_COLUMNS)
+            .eq("id", user_id)
+            .single()
+        )
+        if not resp.data:
+            raise ValueError("Profile not found")
+        return ProfileOut(**resp.data)
 
-def update_profile(db: Client, user_id: str, payload: ProfileUpdate) -> None:
+    return await cache.get_or_load(profile_key(user_id), load)
+
+async def update_profile(db: Client, user_id: str, payload: ProfileUpdate) -> None:
     """Update the user's profile with provided fields."""
     data = {k: v for k, v in payload.model_dump().items() if v is not None}
     if not data:
         raise ValueError("Nothing to update")
-    db.table(PROFILE_TABLE).update(data).eq("id", user_id).execute()
+    if "avatar_url" in data:
+        data.update(dict.fromkeys(AVATAR_DERIVATIVE_COLUMNS.values()))
+    await execute(db.table(PROFILE_TABLE).update(data).eq("id", user_id))
+    cache.invalidate(profile_key(user_id))
 
-def upload_avatar(db: Client, user_id: str, file: UploadFile) -> ProfileOut:
-    """Upload a new avatar for the user and update profile."""
-    contents = file.file.read()
-    ext = file.filename.rsplit(".", 1)[-1].lower()
-    if ext not in ("jpg", "jpeg", "png"):
+async def upload_avatar(db: Client, user_id: str, file: UploadFile) -> ProfileOut:
+    """Stream a new avatar for the user to storage, update profile and queue its derivatives."""
+    if file_extension(file.filename) not in AVATAR_EXTENSIONS:
         raise ValueError("Only JPG/PNG allowed")
+    mime = validate_image(file.filename, file.content_type, AVATAR_EXTENSIONS)
 
-    bucket = "avatars"
     key = f"{user_id}/{file.filename}"
-    storage = db.storage.from_(bucket)
-    resp = storage.upload(key, contents, {"contentType": file.content_type})
-    if resp and getattr(resp, "status_code", 200) >= 400:
-        raise RuntimeError("Upload failed")
-
-    url = storage.get_public_url(key)
-    if not url:
-        raise RuntimeError("Cannot fetch public URL")
+    fh = check_upload(file, mime, settings.max_avatar_bytes)
+    url = await upload_stream(db, AVATAR_BUCKET, key, fh, mime)
+    await execute(
+        db.table(PROFILE_TABLE)
+        .update({"avatar_url": url, **dict.fromkeys(AVATAR_DERIVATIVE_COLUMNS.values())})
+        .eq("id", user_id)
+    )
+    cache.invalidate(profile_key(user_id))
+    await schedule_derivatives(db, AVATAR_BUCKET, url, fh, lambda urls: _store_derivatives(db, user_id, url, urls))
+    return await get_profile(db, user_id)
 
-    db.table(PROFILE_TABLE).update({"avatar_url": url}).eq("id", user_id).execute()
-    return get_profile(db, user_id)
+def _store_derivatives(db: Client, user_id: str, avatar_url: str, urls: Dict[str, str]) -> None:
+    """Record avatar derivative URLs unless the avatar was replaced meanwhile; runs in the image worker pool."""
+    data = {AVATAR_DERIVATIVE_COLUMNS[suffix]: url for suffix, url in urls.items()}
+    db.table(PROFILE_TABLE).update(data).eq("id", user_id).eq("avatar_url", avatar_url).execute()
+    cache.invalidate(profile_key(user_id))
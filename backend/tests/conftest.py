@@ -0,0 +1,51 @@
+import os
+from pathlib import Path
+
+import pytest
+
+# Settings are read at import time; tests never connect to Supabase.
+for key, value in {
+    "SUPABASE_URL": "https://offline.invalid",
+    "SUPABASE_SERVICE_ROLE_KEY": "offline",
+    "DATABASE_URL": "postgresql://offline.invalid/postgres",
+}.items():
+    os.environ.setdefault(key, value)
+
+from backend.benchmarks.fake_supabase import FakeClient  # noqa: E402
+from backend.core.cache import cache  # noqa: E402
+from backend.services.friend_service import adjacency  # noqa: E402
+
+SCHEMA = Path(__file__).with_name("schema.sql")
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def storage() -> FakeClient:
+    """In-memory storage shared by both database backends; uploaded objects land in ``.objects``."""
+    return FakeClient()
+
+@pytest.fixture(params=["fake", "postgres"])
+def db(request, storage):
+    """Service database client: the in-memory FakeClient, or PostgresClient on TEST_DATABASE_URL."""
+    cache.clear()
+    adjacency.clear()
+    if request.param == "fake":
+        client = FakeClient()
+        client.storage = storage.storage
+        yield client
+        return
+
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from sqlalchemy import create_engine
+
+    from backend.db.postgres import PostgresClient, _engine_url
+
+    engine = create_engine(_engine_url(url))
+    with engine.begin() as conn:
+        conn.exec_driver_sql(SCHEMA.read_text())
+    yield PostgresClient(engine, storage.storage)
+    engine.dispose()
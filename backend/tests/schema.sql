@@ -0,0 +1,72 @@
+-- Stand-in for the Supabase tables the services use, for running service tests through
+-- PostgresClient against a plain Postgres (TEST_DATABASE_URL). PostGIS is not required:
+-- locations are stored as EWKB hex text, converted from WKT by a trigger the way a
+-- geography column would be.
+
+drop table if exists memory_shares, photos, memories, friendships, profiles cascade;
+
+create table profiles (
+    id text primary key,
+    username text,
+    full_name text,
+    avatar_url text,
+    avatar_thumbnail_url text,
+    avatar_medium_url text,
+    avatar_webp_url text
+);
+
+create table friendships (
+    user_id text not null,
+    friend_id text not null,
+    status text not null default 'pending',
+    primary key (user_id, friend_id)
+);
+
+create table memories (
+    id text primary key default gen_random_uuid()::text,
+    title text not null,
+    description text,
+    location text,
+    created_by text not null,
+    created_at timestamptz not null default now()
+);
+
+create table photos (
+    id text primary key default gen_random_uuid()::text,
+    memory_id text not null references memories (id),
+    url text not null,
+    uploaded_by text,
+    uploaded_at timestamptz not null default now(),
+    thumbnail_url text,
+    medium_url text,
+    webp_url text
+);
+
+create table memory_shares (
+    memory_id text not null references memories (id),
+    shared_with text not null,
+    shared_by text not null,
+    shared_at timestamptz not null default now(),
+    primary key (memory_id, shared_with)
+);
+
+create or replace function wkt_point_to_ewkb() returns trigger
+language plpgsql
+as $$
+declare
+    coords text[] := regexp_match(new.location, '^POINT\(([^ ]+) ([^ )]+)\)$');
+begin
+    if coords is not null then
+        -- Big-endian EWKB point with SRID 4326.
+        new.location := upper(encode(
+            '\x0020000001000010e6'::bytea || float8send(coords[1]::float8) || float8send(coords[2]::float8),
+            'hex'
+        ));
+    end if;
+    return new;
+end;
+$$;
+
+create trigger memories_location_ewkb
+    before insert or update of location on memories
+    for each row execute function wkt_point_to_ewkb();
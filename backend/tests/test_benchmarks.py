@@ -0,0 +1,22 @@
+import pytest
+
+from backend.benchmarks.runner import Scenario, _read_endpoints, _upload_endpoint, run_scenario, wkb_decoding
+from backend.utils.images import get_image_executor
+
+pytestmark = pytest.mark.anyio
+
+async def test_every_read_endpoint_runs_without_errors():
+    scenario = Scenario(
+        "smoke", "Every read endpoint and a batch upload on a small dataset",
+        {"users": 20, "memories": 200, "photos": 400, "shares": 20, "friend_degree": 5},
+        [*_read_endpoints(), _upload_endpoint(2)._replace(requests=4)],
+    )
+    stats = await run_scenario(scenario, requests=4, concurrencies=[1, 4], cold=True, allocations=False)
+    # Let the uploads' derivative jobs finish here rather than in a later test.
+    get_image_executor().shutdown(wait=True)
+    get_image_executor.cache_clear()
+    assert {s.endpoint for s in stats} == {e.name for e in scenario.endpoints}
+    assert [(s.endpoint, s.concurrency) for s in stats if s.errors] == []
+
+def test_wkb_decoders_agree():
+    assert len(wkb_decoding(rows=1_000, repeat=1)) == 2
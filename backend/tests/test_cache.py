@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from backend.benchmarks.fake_supabase import FakeClient
+from backend.core.cache import MISSING, Cache, MemoryBackend, NullBackend, cache
+from backend.db.supabase import execute
+from backend.services import photo_service
+
+pytestmark = pytest.mark.anyio
+
+N = 20
+LATENCY = 0.05
+
+@pytest.fixture
+def fake() -> FakeClient:
+    client = FakeClient(latency=LATENCY)
+    client.db.insert_rows("photos", [{"id": "p1", "memory_id": "m1", "url": "https://x/photos/m1/a.jpg", "uploaded_by": "u1"}])
+    cache.clear()
+    cache.hits = cache.misses = cache.coalesced = 0
+    yield client
+    cache.clear()
+
+def _local_cache() -> Cache:
+    return Cache(MemoryBackend(100), default_ttl=60)
+
+async def test_identical_concurrent_requests_query_once(fake):
+    results = await asyncio.gather(*(photo_service.list_photos(fake, "m1") for _ in range(N)))
+    assert fake.db.calls == {"select:photos": 1}
+    assert cache.misses == 1
+    assert cache.coalesced == N - 1
+    assert all(photos == results[0] for photos in results)
+
+@pytest.mark.parametrize("backend", [MemoryBackend(100), NullBackend()], ids=["memory", "none"])
+async def test_coalescing_does_not_depend_on_storing(fake, backend):
+    local = Cache(backend, default_ttl=60)
+
+    async def load():
+        return (await execute(fake.table("photos").select("*"))).data
+
+    await asyncio.gather(*(local.get_or_load("k", load) for _ in range(100)))
+    assert fake.db.calls == {"select:photos": 1}
+    assert local.coalesced == 99
+
+async def test_loader_exception_reaches_every_waiter_and_is_not_cached(fake):
+    local = _local_cache()
+
+    async def load():
+        await execute(fake.table("photos").select("*"))
+        raise RuntimeError("upstream down")
+
+    outcomes = await asyncio.gather(*(local.get_or_load("k", load) for _ in range(N)), return_exceptions=True)
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert fake.db.calls == {"select:photos": 1}
+    assert local.backend.get("k") is MISSING
+
+    with pytest.raises(RuntimeError):
+        await local.get_or_load("k", load)
+    assert fake.db.calls == {"select:photos": 2}
+
+async def test_cancelling_one_waiter_does_not_cancel_the_others(fake):
+    local = _local_cache()
+
+    async def load():
+        return (await execute(fake.table("photos").select("*"))).data
+
+    tasks = [asyncio.create_task(local.get_or_load("k", load)) for _ in range(N)]
+    await asyncio.sleep(LATENCY / 5)
+    tasks[1].cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert isinstance(results[1], asyncio.CancelledError)
+    assert all(r == results[0] and len(r) == 1 for i, r in enumerate(results) if i != 1)
+    assert fake.db.calls == {"select:photos": 1}
+
+async def test_cancelling_the_leader_hands_the_load_over(fake):
+    local = _local_cache()
+
+    async def load():
+        return (await execute(fake.table("photos").select("*"))).data
+
+    tasks = [asyncio.create_task(local.get_or_load("k", load)) for _ in range(N)]
+    await asyncio.sleep(LATENCY / 5)
+    tasks[0].cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert all(len(r) == 1 for r in results[1:])
+    assert local.backend.get("k") == results[1]
+
+async def test_invalidate_during_load_drops_the_stale_value(fake):
+    local = _local_cache()
+
+    async def load():
+        return (await execute(fake.table("photos").select("*"))).data
+
+    task = asyncio.create_task(local.get_or_load("k", load))
+    await asyncio.sleep(LATENCY / 5)
+    # Derivative jobs invalidate from the image worker threads.
+    await asyncio.to_thread(local.invalidate, "k")
+    assert len(await task) == 1
+    assert local.backend.get("k") is MISSING
+
+    await local.get_or_load("k", load)
+    assert fake.db.calls == {"select:photos": 2}
@@ -0,0 +1,37 @@
+import pytest
+
+from backend.benchmarks.fake_supabase import FakeClient
+from backend.services import friend_service
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def db() -> FakeClient:
+    friend_service.adjacency.clear()
+    client = FakeClient()
+    client.db.insert_rows("profiles", [
+        {"id": f"u{i}", "username": f"user{i}", "avatar_thumbnail_url": f"https://x/u{i}_thumb.jpg"} for i in range(4)
+    ])
+    client.db.insert_rows("friendships", [
+        {"user_id": "u0", "friend_id": "u1", "status": "accepted"},
+        {"user_id": "u2", "friend_id": "u0", "status": "accepted"},
+        {"user_id": "u0", "friend_id": "u3", "status": "pending"},
+        {"user_id": "ghost", "friend_id": "u0", "status": "pending"},
+        {"user_id": "u1", "friend_id": "u2", "status": "accepted"},
+    ])
+    return client
+
+async def test_graph_joins_profiles_in_one_call(db):
+    graph = await friend_service.get_friend_graph(db, "u0")
+    assert sorted(p.id for p in graph.friends) == ["u1", "u2"]
+    assert [p.id for p in graph.outgoing] == ["u3"]
+    assert graph.outgoing[0].avatar_thumbnail_url == "https://x/u3_thumb.jpg"
+    assert [(p.id, p.username) for p in graph.incoming] == [("ghost", None)]
+    assert db.db.calls == {"select:friend_graph": 1}
+
+async def test_graph_refreshes_the_adjacency_cache(db):
+    await friend_service.get_friend_graph(db, "u0")
+    friends = await friend_service.list_friends(db, "u0")
+    assert len(friends) == 4
+    assert await friend_service.are_friends(db, "u0", "u2")
+    assert db.db.calls == {"select:friend_graph": 1}
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from backend.benchmarks.fake_supabase import point_ewkb
+from backend.utils.geo import wkb_point_to_lat_lng, wkb_points_to_lat_lng
+
+POINT_EMPTY = "0101000020E6100000000000000000F87F000000000000F87F"
+LINESTRING = "0102000020E61000000200000000000000000000000000000000000000000000000000F03F000000000000F03F"
+
+def _scalar(location):
+    return wkb_point_to_lat_lng(location) if isinstance(location, str) else None
+
+@pytest.mark.parametrize("location", [None, 5, "", POINT_EMPTY, "not-hex", "0101000020E61000", LINESTRING])
+def test_unusable_locations_are_invalid(location):
+    lat, lng, valid = wkb_points_to_lat_lng([point_ewkb(52.2, 21.0), location])
+    assert valid.tolist() == [True, False]
+    assert (lat[0], lng[0]) == pytest.approx((52.2, 21.0))
+    assert _scalar(location) is None
+
+def test_vectorized_decoder_matches_scalar():
+    locations = [point_ewkb(49.0 + i / 10, 14.0 + i / 7) for i in range(50)]
+    locations[3:3] = [None, POINT_EMPTY, "zz", LINESTRING]
+    lat, lng, valid = wkb_points_to_lat_lng(locations)
+    vectorized = [(lat[i], lng[i]) if valid[i] else None for i in range(len(locations))]
+    assert vectorized == [_scalar(location) for location in locations]
+
+def test_empty_column():
+    lat, lng, valid = wkb_points_to_lat_lng([])
+    assert lat.shape == lng.shape == valid.shape == (0,)
+    assert valid.dtype == np.bool_
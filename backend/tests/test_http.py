@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from starlette.requests import Request
+
+from backend.core.cache import Cache, MemoryBackend
+from backend.schemas.memory import SharedMemoryOut
+from backend.utils import http
+from backend.utils.http import conditional_json, json_response
+
+adapter = TypeAdapter(List[SharedMemoryOut])
+memories = [
+    SharedMemoryOut(id=f"m{i}", title=f"t{i}", lat=50.5, lng=19.25, created_by="u1",
+                    created_at=datetime(2024, 1, 1, i, tzinfo=timezone.utc), shared_by=None if i else "u2")
+    for i in range(3)
+]
+
+def _request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+def test_json_response_matches_the_encoder_output():
+    response = json_response(memories, adapter)
+    assert response.media_type == "application/json"
+    assert orjson.loads(response.body) == jsonable_encoder(memories)
+
+def test_conditional_json_answers_304_for_a_matching_etag():
+    first = conditional_json(_request(), memories, adapter)
+    etag = first.headers["etag"]
+    assert orjson.loads(first.body) == jsonable_encoder(memories)
+    assert conditional_json(_request(etag), memories, adapter).status_code == 304
+    assert conditional_json(_request(f'W/{etag}, "other"'), memories, adapter).status_code == 304
+    assert conditional_json(_request('"other"'), memories, adapter).status_code == 200
+
+def test_cached_value_is_serialized_once(monkeypatch):
+    local = Cache(MemoryBackend(10), default_ttl=60)
+    monkeypatch.setattr(http, "cache", local)
+    local.backend.set("k", memories, 60)
+    calls = []
+    serialize = http._serialize
+    monkeypatch.setattr(http, "_serialize", lambda v, a: calls.append(v) or serialize(v, a))
+
+    bodies = {conditional_json(_request(), memories, adapter, "k").body for _ in range(3)}
+    assert len(bodies) == 1 and len(calls) == 1
+
+    local.invalidate("k")
+    conditional_json(_request(), memories, adapter, "k")
+    assert len(calls) == 2
@@ -0,0 +1,39 @@
+from postgrest import SyncPostgrestClient
+
+from backend.benchmarks.fake_supabase import FakeClient
+from backend.db.postgres import PostgresClient
+from backend.utils.pagination import apply_keyset, encode_cursor, split_page
+
+KEYS = ("created_at", "id")
+
+def test_postgrest_orders_by_every_key():
+    query = SyncPostgrestClient("https://offline.invalid").table("memories").select("*")
+    params = apply_keyset(query, KEYS, 50, None).request.params
+    assert params["order"] == "created_at.desc,id.desc"
+    assert params["limit"] == "51"
+
+def test_ascending_keyset_after_cursor():
+    query = SyncPostgrestClient("https://offline.invalid").table("profiles").select("*")
+    params = apply_keyset(query, ("username", "id"), 10, encode_cursor(["ann", "u1"]), descending=False).request.params
+    assert params["order"] == "username.asc,id.asc"
+    assert params["or"] == '(username.gt."ann",and(username.eq."ann",id.gt."u1"))'
+
+def test_postgres_orders_by_every_key():
+    query = PostgresClient(engine=None, storage=None).table("memories").select("id")
+    sql, params = apply_keyset(query, KEYS, 50, encode_cursor(["2024-01-01", "m1"])).compile()
+    assert sql.endswith('order by t."created_at" desc, t."id" desc limit 51')
+    assert params == {"p0": "2024-01-01", "p1": "2024-01-01", "p2": "m1"}
+
+def test_pages_cover_ties_exactly_once():
+    db = FakeClient()
+    db.db.insert_rows("memories", [
+        {"id": f"m{i:02}", "created_by": "u1", "title": str(i), "created_at": f"2024-01-0{1 + i // 4}"} for i in range(10)
+    ])
+    seen, cursor = [], None
+    while True:
+        query = apply_keyset(db.table("memories").select("id, created_at").eq("created_by", "u1"), KEYS, 3, cursor)
+        rows, cursor = split_page(query.execute().data, 3, KEYS)
+        seen += [r["id"] for r in rows]
+        if cursor is None:
+            break
+    assert seen == [f"m{i:02}" for i in reversed(range(10))]
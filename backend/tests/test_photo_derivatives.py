@@ -0,0 +1,43 @@
+import io
+
+import pytest
+from PIL import Image
+from starlette.datastructures import Headers, UploadFile
+
+from backend.benchmarks.fake_supabase import FakeClient
+from backend.services import photo_service
+from backend.utils.images import get_image_executor
+
+pytestmark = pytest.mark.anyio
+
+def _jpeg_upload() -> UploadFile:
+    buf = io.BytesIO()
+    Image.new("RGB", (800, 600), "red").save(buf, "JPEG")
+    buf.seek(0)
+    return UploadFile(buf, size=buf.getbuffer().nbytes, filename="a.jpg", headers=Headers({"content-type": "image/jpeg"}))
+
+def _drain_image_jobs() -> None:
+    get_image_executor().shutdown(wait=True)
+    get_image_executor.cache_clear()
+
+@pytest.fixture
+def db() -> FakeClient:
+    client = FakeClient()
+    client.db.insert_rows("memories", [{"id": "m1", "created_by": "u1", "title": "t"}])
+    return client
+
+async def test_derivatives_are_recorded(db):
+    _, photo = await photo_service.upload_photo_to_memory(db, "m1", "u1", _jpeg_upload())
+    _drain_image_jobs()
+    row = db.table("photos").select("*").eq("id", photo.id).execute().data[0]
+    assert all(row[column] for column in photo_service.DERIVATIVE_COLUMNS.values())
+    assert len(db.objects) == 4
+
+@pytest.mark.parametrize("drain_before_delete", [False, True])
+async def test_deleting_a_photo_leaves_no_objects(db, drain_before_delete):
+    _, photo = await photo_service.upload_photo_to_memory(db, "m1", "u1", _jpeg_upload())
+    if drain_before_delete:
+        _drain_image_jobs()
+    await photo_service.delete_photo(db, photo.id, "u1")
+    _drain_image_jobs()
+    assert db.objects == {}
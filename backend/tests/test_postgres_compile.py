@@ -0,0 +1,106 @@
+import pytest
+
+from backend.db.postgres import PostgresClient
+
+client = PostgresClient(engine=None, storage=None)
+
+def test_select_with_filters():
+    sql, params = (
+        client.table("memories").select("id, title")
+        .eq("created_by", "u1").gte("created_at", "2024-01-01").is_("description", "null")
+        .compile()
+    )
+    assert sql == (
+        'select t."id", t."title" from "memories" as t'
+        ' where t."created_by" = :p0 and t."created_at" >= :p1 and t."description" is null'
+    )
+    assert params == {"p0": "u1", "p1": "2024-01-01"}
+
+def test_in_filter_binds_each_value():
+    sql, params = client.table("photos").select("*").in_("memory_id", ["a", "b"]).compile()
+    assert sql == 'select t.* from "photos" as t where t."memory_id" in (:p0, :p1)'
+    assert params == {"p0": "a", "p1": "b"}
+
+def test_empty_in_filter_matches_nothing():
+    sql, _ = client.table("photos").select("*").in_("memory_id", []).compile()
+    assert sql.endswith("where false")
+
+def test_or_with_nested_and():
+    sql, params = (
+        client.table("friendships").select("*")
+        .or_("and(user_id.eq.a,friend_id.eq.b),and(user_id.eq.b,friend_id.eq.a)")
+        .compile()
+    )
+    assert sql == (
+        'select t.* from "friendships" as t where'
+        ' ((t."user_id" = :p0 and t."friend_id" = :p1) or (t."user_id" = :p2 and t."friend_id" = :p3))'
+    )
+    assert params == {"p0": "a", "p1": "b", "p2": "b", "p3": "a"}
+
+def test_or_in_list_and_quoted_values():
+    sql, params = client.table("memories").select("id").or_('id.in.(x,"y,z"),title.ilike.*a*').compile()
+    assert sql == 'select t."id" from "memories" as t where (t."id" in (:p0, :p1) or t."title" ilike :p2)'
+    assert params == {"p0": "x", "p1": "y,z", "p2": "*a*"}
+
+def test_embed_one_and_many():
+    sql, _ = client.table("memory_shares").select("memory_id, memories(*)").compile()
+    assert sql == (
+        'select t."memory_id", (select to_jsonb(e) from "memories" e where e."id" = t."memory_id") as "memories"'
+        ' from "memory_shares" as t'
+    )
+    sql, _ = client.table("memories").select("*, photos(*), memory_shares(shared_with)").compile()
+    assert 'coalesce((select jsonb_agg(to_jsonb(e)) from "photos" e where e."memory_id" = t."id"), \'[]\'::jsonb) as "photos"' in sql
+    assert "jsonb_build_object('shared_with', e.\"shared_with\")" in sql
+
+def test_embed_without_relationship_is_rejected():
+    with pytest.raises(ValueError):
+        client.table("profiles").select("*, photos(*)").compile()
+
+def test_order_limit_and_range():
+    sql, _ = (
+        client.table("memories").select("*")
+        .order("created_at", desc=True).order("id", nullsfirst=False).limit(50)
+        .compile()
+    )
+    assert sql.endswith(' order by t."created_at" desc, t."id" asc nulls last limit 50')
+    sql, _ = client.table("memories").select("*").order("id").range(100, 149).compile()
+    assert sql.endswith(' order by t."id" asc limit 50 offset 100')
+    sql, _ = client.table("memories").select("*").range(0, 9).compile()
+    assert sql.endswith(" limit 10")
+
+def test_keyset_order_spec_with_several_terms():
+    sql, _ = client.table("memories").select("*").order("created_at.desc,id.desc").compile()
+    assert sql.endswith(' order by t."created_at" desc, t."id" desc')
+
+def test_rpc_with_filters_order_and_limit():
+    sql, params = (
+        client.rpc("search_users", {"p_query": "ann", "p_exclude": "u1", "p_limit": None})
+        .gt("username", "b").order("username").limit(20)
+        .compile()
+    )
+    assert sql == (
+        'select t.* from "search_users"("p_query" => :p0, "p_exclude" => :p1, "p_limit" => :p2) as t'
+        ' where t."username" > :p3 order by t."username" asc limit 20'
+    )
+    assert params == {"p0": "ann", "p1": "u1", "p2": None, "p3": "b"}
+
+def test_insert_update_delete():
+    sql, params = client.table("photos").insert([{"url": "a", "memory_id": "m"}, {"url": "b"}]).compile()
+    assert sql == (
+        'insert into "photos" as t ("url", "memory_id") values (:p0, :p1), (:p2, default) returning t.*'
+    )
+    assert params == {"p0": "a", "p1": "m", "p2": "b"}
+    sql, params = client.table("memories").update({"title": "x"}).eq("id", "m").eq("created_by", "u").compile()
+    assert sql == 'update "memories" as t set "title" = :p2 where t."id" = :p0 and t."created_by" = :p1 returning t.*'
+    assert params == {"p0": "m", "p1": "u", "p2": "x"}
+    sql, _ = client.table("memory_shares").delete(returning="minimal").eq("memory_id", "m").compile()
+    assert sql == 'delete from "memory_shares" as t where t."memory_id" = :p0'
+
+@pytest.mark.parametrize("column", ['id"; drop table x; --', "a b", "1abc"])
+def test_identifiers_are_validated(column):
+    with pytest.raises(ValueError):
+        client.table("memories").select("*").eq(column, 1).compile()
+
+def test_unknown_operator_is_rejected():
+    with pytest.raises(ValueError):
+        client.table("memories").select("*").filter("id", "cs", "{1}").compile()
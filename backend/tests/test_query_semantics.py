@@ -0,0 +1,77 @@
+"""PostgREST query semantics the services rely on, checked on both database backends.
+
+FakeClient evaluates the same builder chains in Python; running them through the ``db``
+fixture keeps it honest against PostgresClient on a real database.
+"""
+
+import pytest
+from postgrest.exceptions import APIError
+
+@pytest.fixture
+def rows(db):
+    db.table("memories").insert([
+        {"id": f"m{i}", "title": f"t{i}", "description": None if i % 2 else "d", "location": f"POINT({i} {i})",
+         "created_by": "u1" if i < 4 else "u2", "created_at": f"2024-01-0{1 + i // 2}T00:00:00+00:00"}
+        for i in range(6)
+    ]).execute()
+    db.table("photos").insert([
+        {"id": f"p{i}", "memory_id": f"m{i % 2}", "url": f"https://x/{i}.jpg", "uploaded_by": "u1"} for i in range(3)
+    ]).execute()
+    db.table("memory_shares").insert([
+        {"memory_id": "m0", "shared_with": "u2", "shared_by": "u1"},
+        {"memory_id": "m1", "shared_with": "u3", "shared_by": "u1"},
+    ]).execute()
+    return db
+
+def _ids(result, column="id"):
+    return [row[column] for row in result.data]
+
+def test_filters_and_multi_column_order(rows):
+    query = rows.table("memories").select("id").eq("created_by", "u1").order("created_at", desc=True).order("id", desc=True)
+    assert _ids(query.execute()) == ["m3", "m2", "m1", "m0"]
+    assert _ids(rows.table("memories").select("id").is_("description", "null").order("id").execute()) == ["m1", "m3", "m5"]
+    assert _ids(rows.table("memories").select("id").gte("created_at", "2024-01-03").order("id").execute()) == ["m4", "m5"]
+
+def test_in_filter(rows):
+    assert _ids(rows.table("memories").select("id").in_("id", ["m5", "m1", "nope"]).order("id").execute()) == ["m1", "m5"]
+    assert rows.table("memories").select("id").in_("id", []).execute().data == []
+
+def test_or_tree_with_nested_and(rows):
+    query = rows.table("memories").select("id").or_("id.eq.m5,and(created_by.eq.u1,description.is.null)").order("id")
+    assert _ids(query.execute()) == ["m1", "m3", "m5"]
+
+def test_keyset_or_filter_on_quoted_values(rows):
+    query = (
+        rows.table("memories").select("id")
+        .or_('created_at.lt."2024-01-02T00:00:00+00:00",and(created_at.eq."2024-01-02T00:00:00+00:00",id.lt."m3")')
+        .order("id")
+    )
+    assert _ids(query.execute()) == ["m0", "m1", "m2"]
+
+def test_limit_and_range(rows):
+    base = lambda: rows.table("memories").select("id").order("id")  # noqa: E731
+    assert _ids(base().limit(2).execute()) == ["m0", "m1"]
+    assert _ids(base().range(2, 4).execute()) == ["m2", "m3", "m4"]
+
+def test_embeds(rows):
+    [memory] = rows.table("memories").select("id, photos(*), memory_shares(shared_with)").eq("id", "m0").execute().data
+    assert sorted(p["id"] for p in memory["photos"]) == ["p0", "p2"]
+    assert memory["memory_shares"] == [{"shared_with": "u2"}]
+
+    [empty] = rows.table("memories").select("id, photos(*)").eq("id", "m4").execute().data
+    assert empty["photos"] == []
+
+    [share] = rows.table("memory_shares").select("memory_id, memories(*)").eq("shared_with", "u3").execute().data
+    assert share["memories"]["title"] == "t1"
+
+def test_update_and_delete_return_rows(rows):
+    updated = rows.table("memories").update({"title": "new"}).eq("id", "m0").eq("created_by", "u1").execute().data
+    assert [r["title"] for r in updated] == ["new"]
+    assert rows.table("memories").update({"title": "x"}).eq("id", "m0").eq("created_by", "u2").execute().data == []
+    deleted = rows.table("photos").delete().eq("memory_id", "m1").execute().data
+    assert [row["id"] for row in deleted] == ["p1"]
+
+def test_single(rows):
+    assert rows.table("memories").select("id").eq("id", "m2").single().execute().data == {"id": "m2"}
+    with pytest.raises(APIError):
+        rows.table("memories").select("id").eq("created_by", "u1").single().execute()
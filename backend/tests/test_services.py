@@ -0,0 +1,160 @@
+"""Service functions run against both database backends through the ``db`` fixture."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.core.metrics import request_calls
+from backend.db.instrumented import InstrumentedClient
+from backend.schemas.memory import MemoryCreate
+from backend.services import memory_service, photo_service
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+async def _memory(db, owner: str, i: int = 0, **fields):
+    data = {"title": f"memory {i}", "lat": 50.0 + i / 100, "lng": 19.0 + i / 100, "created_by": owner,
+            "created_at": START + timedelta(hours=i), **fields}
+    return await memory_service.create_memory(db, MemoryCreate(**data))
+
+def _insert(db, table: str, rows):
+    return db.table(table).insert(rows).execute().data
+
+def _befriend(db, a: str, b: str, status: str = "accepted"):
+    _insert(db, "friendships", {"user_id": a, "friend_id": b, "status": status})
+
+async def test_list_memories_decodes_locations(db):
+    created = [await _memory(db, "u1", i) for i in range(3)]
+    await _memory(db, "u2")
+
+    memories = await memory_service.list_memories(db, "u1")
+    assert sorted(m.id for m in memories) == sorted(m.id for m in created)
+    by_id = {m.id: m for m in memories}
+    for m in created:
+        assert (by_id[m.id].lat, by_id[m.id].lng) == pytest.approx((m.lat, m.lng))
+
+async def test_list_photos(db):
+    memory = await _memory(db, "u1")
+    _insert(db, "photos", [{"memory_id": memory.id, "url": f"https://x/photos/{memory.id}/{i}.jpg", "uploaded_by": "u1"}
+                           for i in range(2)])
+    photos = await photo_service.list_photos(db, memory.id)
+    assert sorted(p.url for p in photos) == [f"https://x/photos/{memory.id}/{i}.jpg" for i in range(2)]
+
+async def test_paginate_memories_newest_first(db):
+    created = [await _memory(db, "u1", i) for i in range(7)]
+    # Two memories sharing a timestamp must still be split by the id tie-breaker.
+    created.append(await _memory(db, "u1", 3, title="tie"))
+
+    seen, cursor = [], None
+    while True:
+        page = await memory_service.list_memories_page(db, "u1", 3, cursor)
+        assert len(page.items) <= 3
+        seen += page.items
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert sorted(m.id for m in seen) == sorted(m.id for m in created)
+    assert [m.created_at for m in seen] == sorted((m.created_at for m in seen), reverse=True)
+
+async def test_list_and_paginate_shared_memories(db):
+    _befriend(db, "u1", "u2")
+    memories = [await _memory(db, "u1", i) for i in range(4)]
+    for m in memories:
+        await memory_service.share_memory_with_user(db, m.id, "u2", "u1")
+
+    shared = await memory_service.list_shared_memories(db, "u2")
+    assert sorted(m.id for m in shared) == sorted(m.id for m in memories)
+    assert {m.shared_by for m in shared} == {"u1"}
+
+    first = await memory_service.list_shared_memories_page(db, "u2", 3, None)
+    second = await memory_service.list_shared_memories_page(db, "u2", 3, first.next_cursor)
+    assert len(first.items) == 3 and second.next_cursor is None
+    assert sorted(m.id for m in first.items + second.items) == sorted(m.id for m in memories)
+
+async def test_shared_memories_take_one_query(db):
+    memories = [await _memory(db, f"owner{i % 5}", i) for i in range(50)]
+    _insert(db, "memory_shares", [{"memory_id": m.id, "shared_with": "u2", "shared_by": m.created_by} for m in memories])
+
+    calls = []
+    token = request_calls.set(calls)
+    try:
+        shared = await memory_service.list_shared_memories(InstrumentedClient(db), "u2")
+    finally:
+        request_calls.reset(token)
+    assert [(c.target, c.method) for c in calls] == [("memory_shares", "select")]
+    assert sorted((m.id, m.shared_by) for m in shared) == sorted((m.id, m.created_by) for m in memories)
+
+async def test_edit_memory(db):
+    memory = await _memory(db, "u1")
+    assert [m.title for m in await memory_service.list_memories(db, "u1")] == ["memory 0"]
+
+    await memory_service.edit_memory(db, memory.id, {"title": "renamed", "location": "POINT(21.0 52.2)"}, "u1")
+    [edited] = await memory_service.list_memories(db, "u1")
+    assert edited.title == "renamed"
+    assert (edited.lat, edited.lng) == pytest.approx((52.2, 21.0))
+
+    with pytest.raises(ValueError, match="Tylko właściciel"):
+        await memory_service.edit_memory(db, memory.id, {"title": "stolen"}, "u2")
+    with pytest.raises(ValueError, match="nie istnieje"):
+        await memory_service.edit_memory(db, "00000000-0000-0000-0000-000000000000", {"title": "x"}, "u1")
+
+async def test_share_requires_owner_and_friendship(db):
+    memory = await _memory(db, "u1")
+    _befriend(db, "u1", "u3", status="pending")
+
+    with pytest.raises(ValueError, match="znajomym"):
+        await memory_service.share_memory_with_user(db, memory.id, "u3", "u1")
+    with pytest.raises(ValueError, match="Tylko właściciel"):
+        await memory_service.share_memory_with_user(db, memory.id, "u1", "u3")
+
+    # Accepted after the refusal was cached: the negative answer is re-checked.
+    db.table("friendships").update({"status": "accepted"}).eq("user_id", "u1").eq("friend_id", "u3").execute()
+    await memory_service.share_memory_with_user(db, memory.id, "u3", "u1")
+    assert [s.shared_with for s in await memory_service.get_shares(db, memory.id)] == ["u3"]
+    assert [m.id for m in await memory_service.list_shared_memories(db, "u3")] == [memory.id]
+
+    await memory_service.unshare_memory(db, memory.id, "u3")
+    assert await memory_service.get_shares(db, memory.id) == []
+    assert await memory_service.list_shared_memories(db, "u3") == []
+
+async def test_delete_memory_cascades(db, storage):
+    _befriend(db, "u1", "u2")
+    memory = await _memory(db, "u1")
+    keep = await _memory(db, "u1", 1)
+    url = f"https://storage.invalid/photos/{memory.id}/a.jpg"
+    storage.objects[("photos", f"{memory.id}/a.jpg")] = b"jpeg"
+    storage.objects[("photos", f"{memory.id}/a_thumb.jpg")] = b"jpeg"
+    _insert(db, "photos", {"memory_id": memory.id, "url": url, "uploaded_by": "u1"})
+    await memory_service.share_memory_with_user(db, memory.id, "u2", "u1")
+    assert len(await memory_service.list_shared_memories(db, "u2")) == 1
+
+    with pytest.raises(ValueError, match="Tylko właściciel"):
+        await memory_service.delete_memory(db, memory.id, "u2")
+    await memory_service.delete_memory(db, memory.id, "u1")
+
+    assert [m.id for m in await memory_service.list_memories(db, "u1")] == [keep.id]
+    assert await memory_service.list_shared_memories(db, "u2") == []
+    assert await photo_service.list_photos(db, memory.id) == []
+    assert storage.objects == {}
+    with pytest.raises(ValueError, match="nie istnieje"):
+        await memory_service.delete_memory(db, memory.id, "u1")
+
+async def test_delete_photo_permissions(db, storage):
+    _befriend(db, "u1", "u2")
+    memory = await _memory(db, "u1")
+    await memory_service.share_memory_with_user(db, memory.id, "u2", "u1")
+    mine, theirs = _insert(db, "photos", [
+        {"memory_id": memory.id, "url": f"https://storage.invalid/photos/{memory.id}/{name}.jpg", "uploaded_by": who}
+        for name, who in (("mine", "u2"), ("theirs", "u1"))
+    ])
+
+    with pytest.raises(ValueError, match="udostępnionego"):
+        await photo_service.delete_photo(db, theirs["id"], "u2")
+    with pytest.raises(ValueError, match="Brak uprawnień"):
+        await photo_service.delete_photo(db, theirs["id"], "u3")
+    await photo_service.delete_photo(db, mine["id"], "u2")
+    await photo_service.delete_photo(db, theirs["id"], "u1")
+    assert await photo_service.list_photos(db, memory.id) == []
+    with pytest.raises(ValueError, match="nie istnieje"):
+        await photo_service.delete_photo(db, mine["id"], "u1")
@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from backend.utils.geo import haversine_m
+from backend.utils.spatial import PointIndex
+
+def _points(lats, lngs):
+    return [SimpleNamespace(id=i, lat=float(a), lng=float(b)) for i, (a, b) in enumerate(zip(lats, lngs))]
+
+def _brute_force(items, lat, lng, radius_m, limit):
+    dist = haversine_m(lat, lng, np.array([p.lat for p in items]), np.array([p.lng for p in items]))
+    order = [i for i in np.argsort(dist, kind="stable") if dist[i] <= radius_m][:limit]
+    return [items[i].id for i in order]
+
+@pytest.mark.parametrize("lat, lng, radius_m", [
+    (52.2, 21.0, 5_000),
+    (52.2, 21.0, 200_000),
+    (0.0, 179.9, 50_000),
+    (-10.0, -179.95, 30_000),
+    (89.99, 0.0, 10_000),
+])
+def test_within_matches_brute_force(lat, lng, radius_m):
+    rng = np.random.default_rng(0)
+    items = _points(
+        np.clip(lat + rng.normal(0, 1, 5_000), -90, 90),
+        (lng + rng.normal(0, 1, 5_000) + 180) % 360 - 180,
+    )
+    index = PointIndex(items)
+    found = index.within(lat, lng, radius_m, 100)
+    assert [item.id for item, _ in found] == _brute_force(items, lat, lng, radius_m, 100)
+    assert all(d <= radius_m for _, d in found)
+
+def test_empty_index():
+    assert PointIndex([]).within(0.0, 0.0, 1_000, 10) == []
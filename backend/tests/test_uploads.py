@@ -0,0 +1,104 @@
+import io
+
+import httpx
+import orjson
+import pytest
+from starlette.datastructures import Headers, UploadFile
+
+from backend.benchmarks.fake_supabase import FakeClient
+from backend.core.config import settings
+from backend.core.middleware import MULTIPART_OVERHEAD_BYTES
+from backend.db.supabase import get_db
+from backend.main import create_app
+from backend.utils.storage import FileTooLargeError, check_upload
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+
+def _upload(content: bytes, size: bool = True) -> UploadFile:
+    return UploadFile(io.BytesIO(content), size=len(content) if size else None, filename="a.png")
+
+@pytest.mark.parametrize("size", [True, False])
+def test_check_upload_rejects_oversize_files(size):
+    with pytest.raises(FileTooLargeError):
+        check_upload(_upload(PNG + b"\0" * 100, size), "image/png", len(PNG))
+
+def test_check_upload_rejects_signature_mismatch():
+    with pytest.raises(ValueError, match="nie odpowiada"):
+        check_upload(_upload(b"\xff\xd8\xff" + b"\0" * 64), "image/png", 1024)
+
+def test_check_upload_rejects_empty_files():
+    with pytest.raises(ValueError, match="pusty"):
+        check_upload(_upload(b""), "image/png", 1024)
+
+def test_check_upload_returns_the_rewound_file():
+    file = _upload(PNG)
+    file.file.seek(10)
+    fh = check_upload(file, "image/png", 1024)
+    assert fh is file.file
+    assert fh.read() == PNG
+
+CHUNK = 64 * 1024
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.dependency_overrides[get_db] = lambda: FakeClient()
+    return app
+
+def _avatar_request(padding: int) -> httpx.Request:
+    files = {"file": ("a.png", PNG + b"\0" * padding, "image/png")}
+    request = httpx.Request("POST", "http://test/profile/avatar", data={"user_id": "u1"}, files=files)
+    request.read()
+    return request
+
+async def _send(app, request: httpx.Request, declare_length: bool):
+    """Call the ASGI app directly, counting how many body chunks it pulls."""
+    headers = [(k.lower().encode(), v.encode()) for k, v in request.headers.items()]
+    if not declare_length:
+        headers = [(k, v) for k, v in headers if k != b"content-length"]
+    chunks = [request.content[i:i + CHUNK] for i in range(0, len(request.content), CHUNK)]
+    pulled = 0
+    sent = []
+
+    async def receive():
+        nonlocal pulled
+        if pulled == len(chunks):
+            return {"type": "http.disconnect"}
+        pulled += 1
+        return {"type": "http.request", "body": chunks[pulled - 1], "more_body": pulled < len(chunks)}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/profile/avatar", "raw_path": b"/profile/avatar", "root_path": "", "query_string": b"",
+        "headers": headers, "client": ("test", 1), "server": ("test", 80),
+    }
+    await app(scope, receive, send)
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return sent[0]["status"], body, pulled, len(chunks)
+
+@pytest.mark.anyio
+async def test_declared_oversize_body_is_refused_unread(app):
+    status, body, pulled, _ = await _send(app, _avatar_request(settings.max_avatar_bytes + MULTIPART_OVERHEAD_BYTES), declare_length=True)
+    assert status == 413
+    assert orjson.loads(body)["detail"] == str(FileTooLargeError(settings.max_avatar_bytes))
+    assert pulled == 0
+
+@pytest.mark.anyio
+async def test_undeclared_oversize_body_is_cut_off(app):
+    status, _, pulled, total = await _send(
+        app, _avatar_request(settings.max_avatar_bytes + MULTIPART_OVERHEAD_BYTES + 4 * CHUNK), declare_length=False
+    )
+    assert status == 413
+    assert pulled < total
+
+@pytest.mark.anyio
+async def test_signature_mismatch_is_a_bad_request(app):
+    files = {"file": ("a.png", b"GIF89a" + b"\0" * 64, "image/png")}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/profile/avatar", data={"user_id": "u1"}, files=files)
+    assert response.status_code == 400
+    assert "nie odpowiada" in response.json()["detail"]
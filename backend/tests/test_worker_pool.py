@@ -0,0 +1,35 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from backend.benchmarks.fake_supabase import FakeClient
+from backend.db.supabase import execute, run_sync
+
+pytestmark = pytest.mark.anyio
+
+request_id = contextvars.ContextVar("request_id")
+
+async def test_run_sync_runs_in_a_worker_with_the_callers_context():
+    request_id.set("r1")
+    name, value = await run_sync(lambda: (threading.current_thread().name, request_id.get()))
+    assert name.startswith("supabase")
+    assert value == "r1"
+
+async def test_slow_queries_do_not_block_the_event_loop():
+    db = FakeClient(latency=0.2)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    try:
+        await asyncio.gather(*(execute(db.table("memories").select("*")) for _ in range(4)))
+    finally:
+        ticker.cancel()
+    assert ticks >= 10
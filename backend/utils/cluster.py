@@ -0,0 +1,37 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from backend.utils.geo import lat_lng_to_mercator
+
+TILE_SIZE_PX = 256
+CELL_SIZE_PX = 64
+
+class GridClusters(NamedTuple):
+    lat: np.ndarray
+    lng: np.ndarray
+    count: np.ndarray
+    first: np.ndarray
+    labels: np.ndarray
+
+def grid_cluster(lat: np.ndarray, lng: np.ndarray, zoom: int, cell_px: int = CELL_SIZE_PX) -> GridClusters:
+    """Group points into square screen-space cells of ``cell_px`` pixels at the given zoom level.
+
+    Returns per-cell centroids, member counts and the index of the first member, plus the
+    cell label of every input point.
+    """
+    cells = max(1, (TILE_SIZE_PX << zoom) // cell_px)
+    x, y = lat_lng_to_mercator(lat, lng)
+    ix = np.clip((x * cells).astype(np.int64), 0, cells - 1)
+    iy = np.clip((y * cells).astype(np.int64), 0, cells - 1)
+    keys = ix * cells + iy
+
+    _, first, labels, count = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    labels = labels.reshape(-1)
+    return GridClusters(
+        lat=np.bincount(labels, weights=lat) / count,
+        lng=np.bincount(labels, weights=lng) / count,
+        count=count,
+        first=first,
+        labels=labels,
+    )
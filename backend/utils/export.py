@@ -0,0 +1,34 @@
+from typing import AsyncIterator, List, Tuple
+
+import orjson
+
+from backend.schemas.memory import MemoryOut
+from backend.schemas.photo import PhotoOut
+
+GEOJSON_MEDIA_TYPE = "application/geo+json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def memory_feature(memory: MemoryOut, photos: List[PhotoOut]) -> dict:
+    """GeoJSON Feature of a memory with its photos listed in the properties."""
+    properties = memory.model_dump(mode="json", exclude={"id", "lat", "lng"})
+    properties["photos"] = [photo.model_dump(mode="json", exclude={"memory_id"}) for photo in photos]
+    return {
+        "type": "Feature",
+        "id": memory.id,
+        "geometry": {"type": "Point", "coordinates": [memory.lng, memory.lat]},
+        "properties": properties,
+    }
+
+async def geojson_stream(items: AsyncIterator[Tuple[MemoryOut, List[PhotoOut]]]) -> AsyncIterator[bytes]:
+    """Stream a GeoJSON FeatureCollection one feature at a time."""
+    yield b'{"type":"FeatureCollection","features":['
+    separator = b""
+    async for memory, photos in items:
+        yield separator + orjson.dumps(memory_feature(memory, photos))
+        separator = b","
+    yield b"]}\n"
+
+async def ndjson_stream(items: AsyncIterator[Tuple[MemoryOut, List[PhotoOut]]]) -> AsyncIterator[bytes]:
+    """Stream one GeoJSON Feature per line."""
+    async for memory, photos in items:
+        yield orjson.dumps(memory_feature(memory, photos)) + b"\n"
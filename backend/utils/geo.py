@@ -1,6 +1,13 @@
-from typing import Optional, Tuple
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
 from shapely import wkb
 
+MAX_MERCATOR_LAT = 85.0511287798
+EARTH_RADIUS_M = 6_371_008.8
+POINT_TYPE_ID = 0
+
 def wkb_point_to_lat_lng(location_wkb_hex: str) -> Optional[Tuple[float, float]]:
     """Convert PostGIS WKB hex string to (latitude, longitude) tuple or return None if invalid."""
     try:
@@ -8,3 +15,34 @@ def wkb_point_to_lat_lng(location_wkb_hex: str) -> Optional[Tuple[float, float]]
         return point.y, point.x
     except Exception:
         return None
+
+def wkb_points_to_lat_lng(locations: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Decode a column of PostGIS WKB hex strings into (latitudes, longitudes, valid mask) arrays.
+
+    Missing, malformed, empty and non-point values are marked invalid instead of raising.
+    """
+    values = np.array([loc if isinstance(loc, (str, bytes)) else None for loc in locations], dtype=object)
+    geometries = shapely.from_wkb(values, on_invalid="ignore")
+    # get_x/get_y raise on POINT EMPTY, so only non-empty points reach them.
+    points = ~shapely.is_empty(geometries) & (shapely.get_type_id(geometries) == POINT_TYPE_ID)
+    lat = np.full(len(values), np.nan)
+    lng = np.full(len(values), np.nan)
+    lat[points] = shapely.get_y(geometries[points])
+    lng[points] = shapely.get_x(geometries[points])
+    valid = points & ~(np.isnan(lat) | np.isnan(lng))
+    return lat, lng, valid
+
+def lat_lng_to_mercator(lat: np.ndarray, lng: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Project latitudes/longitudes to Web Mercator (x, y) in the unit square, y growing southwards."""
+    phi = np.radians(np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = (np.asarray(lng, dtype=float) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(phi) + 1.0 / np.cos(phi)) / np.pi) / 2.0
+    return x, y
+
+def haversine_m(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Great-circle distances in metres from one point to arrays of points."""
+    phi1, phi2 = np.radians(lat), np.radians(lats)
+    dphi = phi2 - phi1
+    dlmb = np.radians(np.asarray(lngs) - lng)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -0,0 +1,63 @@
+import hashlib
+from typing import Any, NamedTuple, Optional, Tuple
+
+from fastapi import Query, Request, Response, status
+from pydantic import TypeAdapter
+
+from backend.core.cache import cache
+from backend.core.config import settings
+from backend.utils.pagination import Page
+
+def make_etag(body: bytes) -> str:
+    """Strong entity tag for a serialized response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against an entity tag (weak comparison, RFC 9110)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
+
+def _serialize(value: Any, adapter: TypeAdapter) -> Tuple[str, bytes]:
+    body = adapter.dump_json(value)
+    return make_etag(body), body
+
+def json_response(value: Any, adapter: TypeAdapter, status_code: int = status.HTTP_200_OK) -> Response:
+    """Serialize already validated models straight to JSON bytes, skipping response_model re-validation."""
+    return Response(content=adapter.dump_json(value), media_type="application/json", status_code=status_code)
+
+class PageRequest(NamedTuple):
+    limit: int
+    cursor: Optional[str]
+
+def page_params(
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size),
+    cursor: Optional[str] = None,
+) -> Optional[PageRequest]:
+    """Keyset pagination query parameters; None when the client asked for the full list."""
+    if limit is None and cursor is None:
+        return None
+    return PageRequest(limit or settings.page_size, cursor)
+
+def page_response(page: Page, adapter: TypeAdapter) -> Response:
+    """Serialize a page of items; the cursor of the next page goes into the X-Next-Cursor header."""
+    response = json_response(page.items, adapter)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return response
+
+def conditional_json(request: Request, value: Any, adapter: TypeAdapter, cache_key: Optional[str] = None) -> Response:
+    """Serialize ``value`` once and answer 304 Not Modified when the client's ETag still matches.
+
+    When ``value`` is the service cache entry under ``cache_key``, its ETag and body are kept
+    with that entry and dropped when it is invalidated.
+    """
+    if cache_key is None:
+        etag, body = _serialize(value, adapter)
+    else:
+        etag, body = cache.derive(cache_key, value, lambda v: _serialize(v, adapter))
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
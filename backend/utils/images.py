@@ -0,0 +1,95 @@
+import io
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import BinaryIO, Callable, Dict, Tuple
+
+from PIL import Image, ImageOps
+from supabase import Client
+
+from backend.core.config import settings
+from backend.utils.storage import copy_to_temp, storage_key
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_PX = 320
+MEDIUM_PX = 1280
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+DERIVABLE_MIME_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp")
+
+@lru_cache()
+def get_image_executor() -> ThreadPoolExecutor:
+    """Bounded worker pool for CPU-bound image resizing, separate from the Supabase pool."""
+    return ThreadPoolExecutor(max_workers=settings.image_workers, thread_name_prefix="images")
+
+def derivative_key(key: str, suffix: str) -> str:
+    """Storage key of a derivative, e.g. ``dir/abc.png`` -> ``dir/abc_thumb.jpg``."""
+    return f"{key.rsplit('.', 1)[0]}_{suffix}"
+
+def _encode(image: Image.Image, fmt: str, quality: int) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, fmt, quality=quality, optimize=True)
+    return buf.getvalue()
+
+def render_derivatives(path: str) -> Dict[str, Tuple[bytes, str]]:
+    """Render the thumbnail, medium and optional WebP versions of an image file, keyed by suffix."""
+    with Image.open(path) as original:
+        original.draft("RGB", (MEDIUM_PX, MEDIUM_PX))
+        image = ImageOps.exif_transpose(original)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+    medium = image.copy()
+    medium.thumbnail((MEDIUM_PX, MEDIUM_PX))
+    thumbnail = medium.copy()
+    thumbnail.thumbnail((THUMBNAIL_PX, THUMBNAIL_PX))
+
+    out = {
+        "thumb.jpg": (_encode(thumbnail, "JPEG", JPEG_QUALITY), "image/jpeg"),
+        "medium.jpg": (_encode(medium, "JPEG", JPEG_QUALITY), "image/jpeg"),
+    }
+    if settings.image_webp:
+        out["medium.webp"] = (_encode(medium, "WEBP", WEBP_QUALITY), "image/webp")
+    return out
+
+def _generate(db: Client, bucket: str, key: str, path: str) -> Dict[str, str]:
+    try:
+        renders = render_derivatives(path)
+    finally:
+        os.unlink(path)
+
+    storage = db.storage.from_(bucket)
+    urls: Dict[str, str] = {}
+    for suffix, (content, mime) in renders.items():
+        target = derivative_key(key, suffix)
+        storage.upload(target, content, {"contentType": mime, "upsert": "true"})
+        urls[suffix] = storage.get_public_url(target)
+    return urls
+
+def _log_failure(future: Future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Image derivative generation failed", exc_info=exc)
+
+async def schedule_derivatives(
+    db: Client,
+    bucket: str,
+    public_url: str,
+    fh: BinaryIO,
+    on_done: Callable[[Dict[str, str]], None],
+) -> None:
+    """Generate and store derivatives of an uploaded file in the background.
+
+    The upload is closed once the response is sent, so it is first copied to a temporary
+    file off the event loop; the job deletes that copy once rendered and calls
+    ``on_done(urls)`` in the worker with the public URLs keyed by suffix.
+    """
+    path = await copy_to_temp(fh)
+
+    def job() -> None:
+        on_done(_generate(db, bucket, storage_key(public_url), path))
+
+    get_image_executor().submit(job).add_done_callback(_log_failure)
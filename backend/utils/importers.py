@@ -0,0 +1,105 @@
+from typing import Any, BinaryIO, Dict, Iterator, NamedTuple, Optional, Tuple
+from xml.etree.ElementTree import ParseError, iterparse
+
+import ijson
+import orjson
+
+class ImportRow(NamedTuple):
+    row: int
+    fields: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def parse_gpx(fh: BinaryIO) -> Iterator[ImportRow]:
+    """Yield the waypoints of a GPX file, parsed incrementally so the tree never grows."""
+    try:
+        yield from _iter_waypoints(fh)
+    except ParseError as exc:
+        raise ValueError(f"Nieprawidłowy plik GPX: {exc}") from exc
+
+def _iter_waypoints(fh: BinaryIO) -> Iterator[ImportRow]:
+    row = 0
+    for _, elem in iterparse(fh, events=("end",)):
+        name = _local_name(elem.tag)
+        if name in ("trk", "rte"):
+            elem.clear()
+        if name != "wpt":
+            continue
+        row += 1
+        children = {_local_name(child.tag): (child.text or "").strip() for child in elem}
+        try:
+            fields: Dict[str, Any] = {
+                "lat": float(elem.get("lat", "")),
+                "lng": float(elem.get("lon", "")),
+            }
+        except ValueError:
+            yield ImportRow(row, None, "Brak poprawnych współrzędnych lat/lon")
+        else:
+            fields["title"] = children.get("name")
+            fields["description"] = children.get("desc") or children.get("cmt") or None
+            if children.get("time"):
+                fields["created_at"] = children["time"]
+            yield ImportRow(row, fields)
+        elem.clear()
+
+def _feature_row(row: int, feature: Any) -> ImportRow:
+    if not isinstance(feature, dict) or feature.get("type") != "Feature":
+        return ImportRow(row, None, "Oczekiwano obiektu Feature")
+    geometry = feature.get("geometry") or {}
+    coordinates = geometry.get("coordinates")
+    if geometry.get("type") != "Point" or not isinstance(coordinates, list) or len(coordinates) < 2:
+        return ImportRow(row, None, "Obsługiwane są tylko geometrie Point")
+    properties = feature.get("properties") or {}
+    fields: Dict[str, Any] = {
+        "lng": coordinates[0],
+        "lat": coordinates[1],
+        "title": properties.get("title", properties.get("name")),
+        "description": properties.get("description"),
+    }
+    if properties.get("created_at"):
+        fields["created_at"] = properties["created_at"]
+    return ImportRow(row, fields)
+
+def parse_geojson(fh: BinaryIO) -> Iterator[ImportRow]:
+    """Yield the Point features of a GeoJSON FeatureCollection, parsed incrementally one feature at a time."""
+    try:
+        yield from _iter_features(fh)
+    except ijson.JSONError as exc:
+        raise ValueError(f"Nieprawidłowy plik GeoJSON: {str(exc).splitlines()[0]}") from exc
+
+def _iter_features(fh: BinaryIO) -> Iterator[ImportRow]:
+    collection = False
+
+    def events() -> Iterator[Tuple[str, str, Any]]:
+        nonlocal collection
+        for prefix, event, value in ijson.parse(fh, use_float=True):
+            if prefix == "type" and event == "string":
+                collection = value == "FeatureCollection"
+                if not collection:
+                    raise ValueError("Oczekiwano obiektu FeatureCollection")
+            yield prefix, event, value
+
+    for row, feature in enumerate(ijson.items(events(), "features.item"), start=1):
+        yield _feature_row(row, feature)
+    if not collection:
+        raise ValueError("Oczekiwano obiektu FeatureCollection")
+
+def parse_ndjson(fh: BinaryIO) -> Iterator[ImportRow]:
+    """Yield one Point feature per line, in the format produced by the export."""
+    for row, line in enumerate(fh, start=1):
+        if not line.strip():
+            continue
+        try:
+            feature = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield ImportRow(row, None, "Nieprawidłowy JSON")
+            continue
+        yield _feature_row(row, feature)
+
+PARSERS = {
+    "application/gpx+xml": parse_gpx,
+    "application/geo+json": parse_geojson,
+    "application/x-ndjson": parse_ndjson,
+}
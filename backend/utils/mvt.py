@@ -0,0 +1,96 @@
+import math
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from backend.utils.geo import MAX_MERCATOR_LAT, lat_lng_to_mercator
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+MAX_TILE_ZOOM = 22
+
+_MOVE_TO_ONE = (1 & 0x7) | (1 << 3)
+_POINT = 1
+
+def tile_bounds(z: int, x: int, y: int, buffer: int = TILE_BUFFER) -> Tuple[float, float, float, float]:
+    """Return (min_lat, min_lng, max_lat, max_lng) of a tile grown by ``buffer`` extent units."""
+    n = 1 << z
+    pad = buffer / TILE_EXTENT
+
+    def lng(tx: float) -> float:
+        return max(-180.0, min(180.0, tx / n * 360.0 - 180.0))
+
+    def lat(ty: float) -> float:
+        ty = max(0.0, min(float(n), ty))
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return lat(y + 1 + pad), lng(x - pad), lat(y - pad), lng(x + 1 + pad)
+
+def tiles_containing(lat: float, lng: float, max_zoom: int = MAX_TILE_ZOOM) -> Iterator[Tuple[int, int, int]]:
+    """Yield every (z, x, y) whose buffered area contains the point, for zoom levels 0..max_zoom."""
+    mx, my = lat_lng_to_mercator(np.float64(max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))), np.float64(lng))
+    pad = TILE_BUFFER / TILE_EXTENT
+    for z in range(max_zoom + 1):
+        n = 1 << z
+        fx, fy = float(mx) * n, float(my) * n
+        for x in range(max(0, math.floor(fx - pad)), min(n - 1, math.floor(fx + pad)) + 1):
+            for y in range(max(0, math.floor(fy - pad)), min(n - 1, math.floor(fy + pad)) + 1):
+                yield z, x, y
+
+def to_tile_coords(lat: np.ndarray, lng: np.ndarray, z: int, x: int, y: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Project coordinates to integer positions inside a tile's extent."""
+    mx, my = lat_lng_to_mercator(lat, lng)
+    n = 1 << z
+    px = np.rint((mx * n - x) * TILE_EXTENT).astype(np.int64)
+    py = np.rint((my * n - y) * TILE_EXTENT).astype(np.int64)
+    return px, py
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+def _field(number: int, payload: bytes) -> bytes:
+    return _varint((number << 3) | 2) + _varint(len(payload)) + payload
+
+def _uint_field(number: int, value: int) -> bytes:
+    return _varint(number << 3) + _varint(value)
+
+def _packed(number: int, values: Sequence[int]) -> bytes:
+    return _field(number, b"".join(_varint(v) for v in values))
+
+def encode_point_layer(
+    name: str,
+    px: Sequence[int],
+    py: Sequence[int],
+    properties: List[Dict[str, Any]],
+) -> bytes:
+    """Encode one Mapbox Vector Tile v2 layer of point features with string properties."""
+    keys: Dict[str, int] = {}
+    values: Dict[str, int] = {}
+    features = []
+    for x, y, props in zip(px, py, properties):
+        tags: List[int] = []
+        for key, value in props.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault(str(value), len(values)))
+        feature = _packed(2, tags) + _uint_field(3, _POINT) + _packed(4, (_MOVE_TO_ONE, _zigzag(int(x)), _zigzag(int(y))))
+        features.append(_field(2, feature))
+
+    layer = b"".join((
+        _uint_field(15, 2),
+        _field(1, name.encode("utf-8")),
+        *features,
+        *(_field(3, key.encode("utf-8")) for key in keys),
+        *(_field(4, _field(1, value.encode("utf-8"))) for value in values),
+        _uint_field(5, TILE_EXTENT),
+    ))
+    return _field(3, layer)
@@ -0,0 +1,61 @@
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor holding the sort key of the last row of a page."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError as exc:
+        raise ValueError("Nieprawidłowy kursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Nieprawidłowy kursor")
+    return values
+
+def _quote(value: Any) -> str:
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+def apply_keyset(
+    query: Any,
+    keys: Sequence[str],
+    limit: int,
+    cursor: Optional[str],
+    descending: bool = True,
+) -> Any:
+    """Restrict a PostgREST query to the rows after ``cursor`` in ``keys`` order (one or two columns).
+
+    One extra row is requested so the caller can tell whether another page exists.
+    """
+    op = "lt" if descending else "gt"
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        if len(keys) == 1:
+            query = query.filter(keys[0], op, str(values[0]))
+        else:
+            (sort_col, tie_col), (sort_value, tie_value) = keys, [_quote(v) for v in values]
+            query = query.or_(
+                f"{sort_col}.{op}.{sort_value},and({sort_col}.eq.{sort_value},{tie_col}.{op}.{tie_value})"
+            )
+    for key in keys:
+        query = query.order(key, desc=descending)
+    return query.limit(limit + 1)
+
+def split_page(rows: List[dict], limit: int, keys: Sequence[str]) -> Tuple[List[dict], Optional[str]]:
+    """Trim the look-ahead row and build the cursor of the next page, if any."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][k] for k in keys])
@@ -0,0 +1,51 @@
+import struct
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+BINARY_MAGIC = b"TBP1"
+BINARY_MEDIA_TYPE = "application/vnd.trailback.points"
+COLUMNAR_MEDIA_TYPE = "application/vnd.trailback.points+json"
+COORD_DECIMALS = 6
+
+class MapPoints(NamedTuple):
+    ids: List[str]
+    titles: List[str]
+    lat: np.ndarray
+    lng: np.ndarray
+
+def to_columnar(points: MapPoints) -> Dict[str, Any]:
+    """Parallel-array representation: {"id": [...], "title": [...], "lat": [...], "lng": [...]}."""
+    return {
+        "id": points.ids,
+        "title": points.titles,
+        "lat": np.round(points.lat, COORD_DECIMALS).tolist(),
+        "lng": np.round(points.lng, COORD_DECIMALS).tolist(),
+    }
+
+def _strings_block(values: List[str]) -> Tuple[bytes, bytes]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return offsets.tobytes(), b"".join(encoded)
+
+def to_binary(points: MapPoints) -> bytes:
+    """Packed little-endian layout, 4-byte aligned for typed-array views on the client.
+
+    header: magic ``TBP1``, uint32 count, uint32 id bytes, uint32 title bytes
+    float32 lat[count], float32 lng[count]
+    uint32 id_offsets[count + 1], uint32 title_offsets[count + 1]
+    UTF-8 ids, UTF-8 titles
+    """
+    id_offsets, id_blob = _strings_block(points.ids)
+    title_offsets, title_blob = _strings_block(points.titles)
+    header = struct.pack("<4sIII", BINARY_MAGIC, len(points.ids), len(id_blob), len(title_blob))
+    return b"".join((
+        header,
+        points.lat.astype("<f4").tobytes(),
+        points.lng.astype("<f4").tobytes(),
+        id_offsets,
+        title_offsets,
+        id_blob,
+        title_blob,
+    ))
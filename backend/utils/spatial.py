@@ -0,0 +1,43 @@
+import math
+from typing import Generic, List, Sequence, Tuple, TypeVar
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from backend.utils.geo import EARTH_RADIUS_M, haversine_m
+
+T = TypeVar("T")
+
+class PointIndex(Generic[T]):
+    """STRtree over items with ``lat``/``lng`` attributes answering great-circle radius queries."""
+
+    def __init__(self, items: Sequence[T]) -> None:
+        self.items = list(items)
+        self.lat = np.array([item.lat for item in self.items], dtype=float)
+        self.lng = np.array([item.lng for item in self.items], dtype=float)
+        self.tree = STRtree(shapely.points(self.lng, self.lat))
+
+    def _candidates(self, lat: float, lng: float, radius_m: float) -> np.ndarray:
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        if abs(lat) + dlat >= 90:
+            return np.arange(len(self.items))
+        dlng = min(180.0, dlat / math.cos(math.radians(abs(lat) + dlat)))
+        south, north = lat - dlat, lat + dlat
+        boxes = [shapely.box(lng - dlng, south, lng + dlng, north)]
+        if lng - dlng < -180:
+            boxes.append(shapely.box(lng - dlng + 360, south, 180, north))
+        if lng + dlng > 180:
+            boxes.append(shapely.box(-180, south, lng + dlng - 360, north))
+        return np.unique(np.concatenate([self.tree.query(box) for box in boxes]))
+
+    def within(self, lat: float, lng: float, radius_m: float, limit: int) -> List[Tuple[T, float]]:
+        """Return up to ``limit`` items within ``radius_m`` metres, nearest first, with their distances."""
+        if not self.items:
+            return []
+        idx = self._candidates(lat, lng, radius_m)
+        dist = haversine_m(lat, lng, self.lat[idx], self.lng[idx])
+        keep = dist <= radius_m
+        idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")[:limit]
+        return [(self.items[i], d) for i, d in zip(idx[order].tolist(), dist[order].tolist())]
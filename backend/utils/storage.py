@@ -1,13 +1,184 @@
+import asyncio
+import io
+import logging
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Collection, List, Optional
 from uuid import uuid4
+from fastapi import UploadFile
 from supabase import Client
 
-def upload_file(db: Client, bucket: str, directory: str, filename: str, content: bytes, mime: str) -> str:
-    """Upload a file to Supabase storage and return its public URL."""
-    key = f"{directory}/{uuid4().hex}.{filename.rsplit('.', 1)[-1].lower()}"
-    db.storage.from_(bucket).upload(key, content, {"contentType": mime})
-    return db.storage.from_(bucket).get_public_url(key)
+from backend.core.config import settings
+from backend.db.supabase import run_sync
 
-def delete_file(db: Client, bucket: str, public_url: str) -> None:
+logger = logging.getLogger(__name__)
+
+REMOVE_BATCH_SIZE = 1000
+RETRY_BACKOFF_SECONDS = 0.5
+
+IMAGE_MIME_TYPES = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "heic": "image/heic",
+    "heif": "image/heif",
+}
+
+IMPORT_MIME_TYPES = {
+    "gpx": "application/gpx+xml",
+    "geojson": "application/geo+json",
+    "json": "application/geo+json",
+    "ndjson": "application/x-ndjson",
+}
+
+class FileTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(f"Plik przekracza limit {max_bytes // (1024 * 1024)} MB")
+        self.max_bytes = max_bytes
+
+def _matches_signature(mime: str, head: bytes) -> bool:
+    if mime == "image/jpeg":
+        return head.startswith(b"\xff\xd8\xff")
+    if mime == "image/png":
+        return head.startswith(b"\x89PNG\r\n\x1a\n")
+    if mime == "image/gif":
+        return head[:6] in (b"GIF87a", b"GIF89a")
+    if mime == "image/webp":
+        return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+    if mime in ("image/heic", "image/heif"):
+        return head[4:8] == b"ftyp"
+    text = head.removeprefix(b"\xef\xbb\xbf").lstrip()
+    if mime == "application/gpx+xml":
+        return text.startswith(b"<") or not text
+    if mime in ("application/geo+json", "application/x-ndjson"):
+        return text.startswith(b"{") or not text
+    return False
+
+def storage_key(public_url: str) -> str:
+    """Derive the storage object key (directory/filename) from its public URL."""
+    return "/".join(public_url.split("?", 1)[0].split("/")[-2:])
+
+def file_extension(filename: Optional[str]) -> str:
+    """Return the lowercased extension of a filename, or an empty string."""
+    if not filename or "." not in filename:
+        return ""
+    return filename.rsplit(".", 1)[-1].lower()
+
+def validate_image(filename: Optional[str], content_type: Optional[str], allowed: Collection[str]) -> str:
+    """Check the extension and declared type of an image upload before reading it; return its MIME type."""
+    ext = file_extension(filename)
+    if ext not in allowed:
+        raise ValueError(f"Dozwolone formaty: {', '.join(sorted(allowed))}")
+    if content_type and not content_type.startswith("image/") and content_type != "application/octet-stream":
+        raise ValueError("Plik nie jest obrazem")
+    return IMAGE_MIME_TYPES[ext]
+
+def check_upload(file: UploadFile, mime: str, max_bytes: int) -> BinaryIO:
+    """Validate an upload Starlette has already spooled and return its file, rewound.
+
+    The size limit is checked against ``file.size`` and the content signature against the
+    first bytes, so the upload is never copied; the file stays open until the response has
+    been sent and can be handed to storage or a parser as is. Oversize request bodies are
+    cut off while they stream in by ``UploadLimitMiddleware``; this check applies the
+    limit to each file of a multi-file body.
+    """
+    fh = file.file
+    size = file.size if file.size is not None else fh.seek(0, os.SEEK_END)
+    if size > max_bytes:
+        raise FileTooLargeError(max_bytes)
+    if not size:
+        raise ValueError("Plik jest pusty")
+    fh.seek(0)
+    head = fh.read(16)
+    fh.seek(0)
+    if not _matches_signature(mime, head):
+        raise ValueError("Zawartość pliku nie odpowiada jego rozszerzeniu")
+    return fh
+
+class _FileStream(io.RawIOBase):
+    """Raw stream over any binary file, so storage3 accepts it as a ``BufferedReader`` and streams it."""
+
+    def __init__(self, fh: BinaryIO) -> None:
+        self._fh = fh
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray) -> int:
+        data = self._fh.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._fh.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._fh.tell()
+
+def _upload_stream(db: Client, bucket: str, key: str, fh: BinaryIO, mime: str) -> str:
+    storage = db.storage.from_(bucket)
+    fh.seek(0)
+    stream = io.BufferedReader(_FileStream(fh), settings.upload_chunk_bytes)
+    resp = storage.upload(key, stream, {"contentType": mime})
+    if resp is not None and getattr(resp, "status_code", 200) >= 400:
+        raise RuntimeError("Upload failed")
+    url = storage.get_public_url(key)
+    if not url:
+        raise RuntimeError("Cannot fetch public URL")
+    return url
+
+async def upload_stream(db: Client, bucket: str, key: str, fh: BinaryIO, mime: str) -> str:
+    """Stream an open file to Supabase storage under the given key and return its public URL."""
+    return await run_sync(_upload_stream, db, bucket, key, fh, mime)
+
+def _copy_to_temp(fh: BinaryIO) -> str:
+    fh.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False) as tmp:
+        shutil.copyfileobj(fh, tmp, settings.upload_chunk_bytes)
+    return tmp.name
+
+async def copy_to_temp(fh: BinaryIO) -> str:
+    """Copy an open file to a new temporary file in a worker thread and return its path."""
+    return await run_sync(_copy_to_temp, fh)
+
+async def upload_file(db: Client, bucket: str, directory: str, filename: str, fh: BinaryIO, mime: str) -> str:
+    """Upload a file to Supabase storage under a random key and return its public URL."""
+    key = f"{directory}/{uuid4().hex}.{file_extension(filename)}"
+    return await upload_stream(db, bucket, key, fh, mime)
+
+async def delete_file(db: Client, bucket: str, public_url: str) -> None:
     """Delete a file from Supabase storage based on its public URL."""
-    key = "/".join(public_url.split("/")[-2:])
-    db.storage.from_(bucket).remove([key])
+    await run_sync(db.storage.from_(bucket).remove, [storage_key(public_url)])
+
+async def delete_files(db: Client, bucket: str, public_urls: List[str]) -> None:
+    """Delete many files with bulk remove calls, retrying each batch with exponential backoff."""
+    keys = [storage_key(url) for url in public_urls]
+    storage = db.storage.from_(bucket)
+    for start in range(0, len(keys), REMOVE_BATCH_SIZE):
+        batch = keys[start:start + REMOVE_BATCH_SIZE]
+        for attempt in range(1, settings.storage_remove_attempts + 1):
+            try:
+                await run_sync(storage.remove, batch)
+                break
+            except Exception:
+                if attempt == settings.storage_remove_attempts:
+                    raise
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+async def delete_files_in_background(db: Client, bucket: str, public_urls: List[str]) -> None:
+    """Background-task variant of delete_files that logs the keys it could not remove."""
+    try:
+        await delete_files(db, bucket, public_urls)
+    except Exception:
+        logger.exception(
+            "Could not remove %d objects from bucket %s: %s",
+            len(public_urls), bucket, [storage_key(url) for url in public_urls],
+        )